@@ -11,7 +11,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         MainWindow.setObjectName("MainWindow")
-        MainWindow.resize(632, 318)
+        MainWindow.resize(632, 540)
         self.centralwidget = QtWidgets.QWidget(MainWindow)
         self.centralwidget.setObjectName("centralwidget")
         self.verticalLayout_2 = QtWidgets.QVBoxLayout(self.centralwidget)
@@ -59,9 +59,53 @@ class Ui_MainWindow(object):
         self.model_combo_box.addItem("")
         self.model_combo_box.addItem("")
         self.horizontalLayout_2.addWidget(self.model_combo_box)
+        self.pixel_coords_check_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.pixel_coords_check_box.setObjectName("pixel_coords_check_box")
+        self.horizontalLayout_2.addWidget(self.pixel_coords_check_box)
         spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
         self.horizontalLayout_2.addItem(spacerItem)
         self.verticalLayout.addLayout(self.horizontalLayout_2)
+        self.horizontalLayout_5 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_5.setContentsMargins(-1, 6, -1, -1)
+        self.horizontalLayout_5.setObjectName("horizontalLayout_5")
+        self.label_5 = QtWidgets.QLabel(self.centralwidget)
+        self.label_5.setObjectName("label_5")
+        self.horizontalLayout_5.addWidget(self.label_5)
+        self.stride_spin_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.stride_spin_box.setMinimum(1)
+        self.stride_spin_box.setMaximum(1000)
+        self.stride_spin_box.setObjectName("stride_spin_box")
+        self.horizontalLayout_5.addWidget(self.stride_spin_box)
+        self.label_6 = QtWidgets.QLabel(self.centralwidget)
+        self.label_6.setObjectName("label_6")
+        self.horizontalLayout_5.addWidget(self.label_6)
+        self.target_fps_spin_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.target_fps_spin_box.setDecimals(1)
+        self.target_fps_spin_box.setMaximum(240.0)
+        self.target_fps_spin_box.setObjectName("target_fps_spin_box")
+        self.horizontalLayout_5.addWidget(self.target_fps_spin_box)
+        self.label_7 = QtWidgets.QLabel(self.centralwidget)
+        self.label_7.setObjectName("label_7")
+        self.horizontalLayout_5.addWidget(self.label_7)
+        self.start_spin_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.start_spin_box.setDecimals(1)
+        self.start_spin_box.setMaximum(86400.0)
+        self.start_spin_box.setObjectName("start_spin_box")
+        self.horizontalLayout_5.addWidget(self.start_spin_box)
+        self.label_8 = QtWidgets.QLabel(self.centralwidget)
+        self.label_8.setObjectName("label_8")
+        self.horizontalLayout_5.addWidget(self.label_8)
+        self.end_spin_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.end_spin_box.setDecimals(1)
+        self.end_spin_box.setMaximum(86400.0)
+        self.end_spin_box.setObjectName("end_spin_box")
+        self.horizontalLayout_5.addWidget(self.end_spin_box)
+        self.motion_gate_check_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.motion_gate_check_box.setObjectName("motion_gate_check_box")
+        self.horizontalLayout_5.addWidget(self.motion_gate_check_box)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_5.addItem(spacerItem1)
+        self.verticalLayout.addLayout(self.horizontalLayout_5)
         self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_3.setContentsMargins(-1, 24, -1, -1)
         self.horizontalLayout_3.setObjectName("horizontalLayout_3")
@@ -86,6 +130,44 @@ class Ui_MainWindow(object):
         self.video_output_button.setObjectName("video_output_button")
         self.horizontalLayout_4.addWidget(self.video_output_button)
         self.verticalLayout.addLayout(self.horizontalLayout_4)
+        self.horizontalLayout_6 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_6.setObjectName("horizontalLayout_6")
+        self.add_files_button = QtWidgets.QPushButton(self.centralwidget)
+        self.add_files_button.setObjectName("add_files_button")
+        self.horizontalLayout_6.addWidget(self.add_files_button)
+        self.add_folder_button = QtWidgets.QPushButton(self.centralwidget)
+        self.add_folder_button.setObjectName("add_folder_button")
+        self.horizontalLayout_6.addWidget(self.add_folder_button)
+        self.clear_jobs_button = QtWidgets.QPushButton(self.centralwidget)
+        self.clear_jobs_button.setObjectName("clear_jobs_button")
+        self.horizontalLayout_6.addWidget(self.clear_jobs_button)
+        spacerItem2 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_6.addItem(spacerItem2)
+        self.label_9 = QtWidgets.QLabel(self.centralwidget)
+        self.label_9.setObjectName("label_9")
+        self.horizontalLayout_6.addWidget(self.label_9)
+        self.workers_spin_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.workers_spin_box.setMinimum(1)
+        self.workers_spin_box.setMaximum(16)
+        self.workers_spin_box.setProperty("value", 2)
+        self.workers_spin_box.setObjectName("workers_spin_box")
+        self.horizontalLayout_6.addWidget(self.workers_spin_box)
+        self.verticalLayout.addLayout(self.horizontalLayout_6)
+        self.jobs_table = QtWidgets.QTableWidget(self.centralwidget)
+        self.jobs_table.setMinimumSize(QtCore.QSize(0, 150))
+        self.jobs_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.jobs_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.jobs_table.setObjectName("jobs_table")
+        self.jobs_table.setColumnCount(3)
+        self.jobs_table.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.jobs_table.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.jobs_table.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.jobs_table.setHorizontalHeaderItem(2, item)
+        self.jobs_table.horizontalHeader().setStretchLastSection(True)
+        self.verticalLayout.addWidget(self.jobs_table)
         self.progress_bar = QtWidgets.QProgressBar(self.centralwidget)
         self.progress_bar.setProperty("value", 0)
         self.progress_bar.setTextVisible(False)
@@ -94,8 +176,8 @@ class Ui_MainWindow(object):
         self.horizontalLayout = QtWidgets.QHBoxLayout()
         self.horizontalLayout.setContentsMargins(-1, 24, -1, -1)
         self.horizontalLayout.setObjectName("horizontalLayout")
-        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-        self.horizontalLayout.addItem(spacerItem1)
+        spacerItem3 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem3)
         self.cancel_button = QtWidgets.QPushButton(self.centralwidget)
         self.cancel_button.setEnabled(False)
         self.cancel_button.setCheckable(True)
@@ -105,8 +187,8 @@ class Ui_MainWindow(object):
         self.ok_button = QtWidgets.QPushButton(self.centralwidget)
         self.ok_button.setObjectName("ok_button")
         self.horizontalLayout.addWidget(self.ok_button)
-        spacerItem2 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-        self.horizontalLayout.addItem(spacerItem2)
+        spacerItem4 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem4)
         self.verticalLayout.addLayout(self.horizontalLayout)
         self.verticalLayout.setStretch(0, 1)
         self.verticalLayout_2.addLayout(self.verticalLayout)
@@ -132,10 +214,28 @@ class Ui_MainWindow(object):
         self.model_combo_box.setItemText(1, _translate("MainWindow", "mobilenet_thin"))
         self.model_combo_box.setItemText(2, _translate("MainWindow", "mobilenet_v2_large"))
         self.model_combo_box.setItemText(3, _translate("MainWindow", "mobilenet_v2_small"))
+        self.pixel_coords_check_box.setText(_translate("MainWindow", "Координаты в пикселях"))
+        self.label_5.setText(_translate("MainWindow", "Шаг кадров:"))
+        self.label_6.setText(_translate("MainWindow", "FPS анализа:"))
+        self.target_fps_spin_box.setSpecialValueText(_translate("MainWindow", "все"))
+        self.label_7.setText(_translate("MainWindow", "Начало, с:"))
+        self.label_8.setText(_translate("MainWindow", "Конец, с:"))
+        self.end_spin_box.setSpecialValueText(_translate("MainWindow", "до конца"))
+        self.motion_gate_check_box.setText(_translate("MainWindow", "Пропускать статичные кадры"))
         self.save_video_check_box.setText(_translate("MainWindow", "Показать ключевые точки в видео"))
         self.dark_bg_check_box.setText(_translate("MainWindow", "Темный фон"))
         self.label_4.setText(_translate("MainWindow", "Сохранить видео как:"))
         self.video_output_button.setText(_translate("MainWindow", "Выбрать"))
+        self.add_files_button.setText(_translate("MainWindow", "Добавить видео"))
+        self.add_folder_button.setText(_translate("MainWindow", "Добавить папку"))
+        self.clear_jobs_button.setText(_translate("MainWindow", "Очистить"))
+        self.label_9.setText(_translate("MainWindow", "Одновременно:"))
+        item = self.jobs_table.horizontalHeaderItem(0)
+        item.setText(_translate("MainWindow", "Видео"))
+        item = self.jobs_table.horizontalHeaderItem(1)
+        item.setText(_translate("MainWindow", "Прогресс"))
+        item = self.jobs_table.horizontalHeaderItem(2)
+        item.setText(_translate("MainWindow", "Статус"))
         self.progress_bar.setFormat(_translate("MainWindow", "%p%"))
         self.cancel_button.setText(_translate("MainWindow", "Прервать"))
         self.ok_button.setText(_translate("MainWindow", "ОК"))
@@ -1,22 +1,47 @@
+import os
 import sys
+from collections import deque
+from functools import partial
 
 from PyQt5 import QtWidgets, QtGui
 
 import design
 from processing import VideoProcesserThread
 
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv', '.mov', '.wmv', '.mpg', '.mpeg')
+
+
+class Job:
+    def __init__(self, video_path, output_csv, output_video, progress_bar):
+        self.video_path = video_path
+        self.output_csv = output_csv
+        self.output_video = output_video
+        self.progress_bar = progress_bar
+        self.thread = None
+        self.progress = 0
+        self.is_finished = False
+
 
 class OpenposeApp(QtWidgets.QMainWindow, design.Ui_MainWindow):
     def __init__(self):
         super().__init__()
         self.setupUi(self)
-        self.setFixedSize(632, 318)
+        self.setFixedSize(632, 540)
         self.setWindowIcon(QtGui.QIcon("icon.png"))
 
+        self.jobs = []
+        self.pending_jobs = deque()
+        self.running_jobs = []
+        self.failed_jobs = 0
+        self.is_cancelled = False
+
         self.save_video_check_box.toggled.connect(self.on_toggle_save_video)
         self.input_button.clicked.connect(self.browse_input_file)
         self.csv_output_button.clicked.connect(self.browse_output_file)
         self.video_output_button.clicked.connect(self.browse_output_video)
+        self.add_files_button.clicked.connect(self.browse_input_files)
+        self.add_folder_button.clicked.connect(self.browse_input_folder)
+        self.clear_jobs_button.clicked.connect(self.clear_jobs)
         self.ok_button.clicked.connect(self.process_video)
         self.cancel_button.clicked.connect(self.cancel_processing)
 
@@ -34,57 +59,90 @@ class OpenposeApp(QtWidgets.QMainWindow, design.Ui_MainWindow):
             self.video_output_line_edit.setEnabled(True)
             self.video_output_button.setEnabled(True)
 
-    def on_done(self):
-        self.cancel_button.setEnabled(False)
-        self.progress_bar.setValue(100)
-
+    def show_message(self, icon, text, buttons):
         mbox = QtWidgets.QMessageBox()
-        mbox.setIcon(QtWidgets.QMessageBox.Information)
+        mbox.setIcon(icon)
         mbox.setWindowTitle('Openpose')
-        mbox.setText('Видео успешно обработано')
-        mbox.setStandardButtons(QtWidgets.QMessageBox.Ok)
+        mbox.setText(text)
+        mbox.setStandardButtons(buttons)
         mbox.show()
         mbox.exec_()
-        self.progress_bar.setValue(0)
 
-    def on_error(self, e):
-        self.cancel_button.setEnabled(False)
-        self.progress_bar.setValue(0)
+    def on_done(self, job):
+        text = 'Готово'
+        if job.thread.motion_gate:
+            text += ', статичных кадров пропущено: {}'.format(job.thread.motion_gate.skipped)
+        self.on_update_progress(job, 100)
+        self.on_job_finished(job, text)
 
-        mbox = QtWidgets.QMessageBox()
-        mbox.setIcon(QtWidgets.QMessageBox.Critical)
-        mbox.setWindowTitle('Openpose')
-        mbox.setText(str(e))
-        mbox.setStandardButtons(QtWidgets.QMessageBox.Close)
-        mbox.show()
-        mbox.exec_()
+    def on_error(self, job, e):
+        self.failed_jobs += 1
+        self.on_job_finished(job, 'Ошибка: {}'.format(e))
 
-    def on_interrupted(self):
+    def on_interrupted(self, job):
+        self.on_job_finished(job, 'Прервано')
+
+    def on_job_finished(self, job, status):
+        job.is_finished = True
+        self.set_job_status(job, status)
+        if job in self.running_jobs:
+            self.running_jobs.remove(job)
+        self.start_jobs()
+
+    def on_queue_finished(self):
         self.cancel_button.setEnabled(False)
-        self.progress_bar.setValue(0)
+        self.ok_button.setEnabled(True)
 
-        mbox = QtWidgets.QMessageBox()
-        mbox.setIcon(QtWidgets.QMessageBox.Warning)
-        mbox.setWindowTitle('Openpose')
-        mbox.setText("Обработка видео прервана пользователем")
-        mbox.setStandardButtons(QtWidgets.QMessageBox.Close)
-        mbox.show()
-        mbox.exec_()
+        if self.is_cancelled:
+            self.progress_bar.setValue(0)
+            self.show_message(QtWidgets.QMessageBox.Warning, "Обработка видео прервана пользователем",
+                              QtWidgets.QMessageBox.Close)
+        elif self.failed_jobs:
+            self.show_message(QtWidgets.QMessageBox.Critical,
+                              'Не удалось обработать видео: {} из {}'.format(self.failed_jobs, len(self.jobs)),
+                              QtWidgets.QMessageBox.Close)
+        else:
+            self.progress_bar.setValue(100)
+            self.show_message(QtWidgets.QMessageBox.Information, 'Видео успешно обработано',
+                              QtWidgets.QMessageBox.Ok)
+            self.progress_bar.setValue(0)
 
-    def on_update_progress(self, value):
-        self.progress_bar.setValue(value)
+    def on_update_progress(self, job, value):
+        job.progress = value
+        job.progress_bar.setValue(value)
+        self.progress_bar.setValue(sum(job.progress for job in self.jobs) // max(len(self.jobs), 1))
 
     def cancel_processing(self):
-        if self.process_thread:
-            self.process_thread.is_active = False
+        self.is_cancelled = True
+        while self.pending_jobs:
+            job = self.pending_jobs.popleft()
+            job.is_finished = True
+            self.set_job_status(job, 'Отменено')
+        for job in self.running_jobs:
+            job.thread.is_active = False
 
     def browse_input_file(self):
         file = QtWidgets.QFileDialog.getOpenFileName(self, "Выберите видеофайл")
         if file and len(file) > 0:
             self.video_line_edit.setText(file[0])
 
+    def browse_input_files(self):
+        files = QtWidgets.QFileDialog.getOpenFileNames(self, "Выберите видеофайлы")
+        for file in files[0]:
+            self.add_job(file)
+
+    def browse_input_folder(self):
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Выберите папку с видео")
+        if not folder:
+            return
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                self.add_job(os.path.join(folder, name))
+
     def browse_output_file(self):
-        file = QtWidgets.QFileDialog.getSaveFileName(self, "Выберите csv-файл для сохранения ключевых точек")
+        file = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Выберите файл для сохранения ключевых точек", "",
+            "CSV (*.csv);;NumPy (*.npy *.npz)")
         if file and len(file) > 0:
             self.csv_output_line_edit.setText(file[0])
 
@@ -93,6 +151,90 @@ class OpenposeApp(QtWidgets.QMainWindow, design.Ui_MainWindow):
         if file and len(file) > 0:
             self.video_output_line_edit.setText(file[0])
 
+    def get_job_outputs(self, video_path):
+        """
+        Outputs of a queued video are named after it, in the folders (and with the keypoints format)
+        of the paths entered in the form, or next to the video when they are empty.
+        """
+        name = os.path.splitext(os.path.basename(video_path))[0]
+        csv_path = self.csv_output_line_edit.text()
+        csv_ext = os.path.splitext(csv_path)[1] or '.csv'
+        output_csv = os.path.join(os.path.dirname(csv_path) or os.path.dirname(video_path), name + csv_ext)
+
+        output_video = ''
+        if self.save_video_check_box.isChecked():
+            video_dir = os.path.dirname(self.video_output_line_edit.text()) or os.path.dirname(video_path)
+            output_video = os.path.join(video_dir, name + '_keypoints.avi')
+        return output_csv, output_video
+
+    def add_job(self, video_path, output_csv=None, output_video=None):
+        if output_csv is None:
+            output_csv, output_video = self.get_job_outputs(video_path)
+
+        row = self.jobs_table.rowCount()
+        self.jobs_table.insertRow(row)
+        self.jobs_table.setItem(row, 0, QtWidgets.QTableWidgetItem(os.path.basename(video_path)))
+        self.jobs_table.item(row, 0).setToolTip(video_path)
+        progress_bar = QtWidgets.QProgressBar()
+        self.jobs_table.setCellWidget(row, 1, progress_bar)
+        self.jobs_table.setItem(row, 2, QtWidgets.QTableWidgetItem('В очереди'))
+
+        job = Job(video_path, output_csv, output_video, progress_bar)
+        self.jobs.append(job)
+        self.pending_jobs.append(job)
+        return job
+
+    def set_job_status(self, job, status):
+        item = self.jobs_table.item(self.jobs.index(job), 2)
+        item.setText(status)
+        item.setToolTip(status)
+
+    def remove_jobs(self, jobs):
+        for row in reversed(range(len(self.jobs))):
+            job = self.jobs[row]
+            if job not in jobs or job in self.running_jobs:
+                continue
+            if job in self.pending_jobs:
+                self.pending_jobs.remove(job)
+            self.jobs.pop(row)
+            self.jobs_table.removeRow(row)
+
+    def clear_jobs(self):
+        self.remove_jobs(list(self.jobs))
+
+    def start_job(self, job):
+        has_background = not self.dark_bg_check_box.isChecked()
+        model = str(self.model_combo_box.currentText())
+
+        job.thread = VideoProcesserThread(
+            video_path=job.video_path,
+            output_csv=job.output_csv,
+            output_video=job.output_video,
+            model=model,
+            show_bg=has_background,
+            pixel_coords=self.pixel_coords_check_box.isChecked(),
+            stride=self.stride_spin_box.value(),
+            target_fps=self.target_fps_spin_box.value(),
+            start=self.start_spin_box.value(),
+            end=self.end_spin_box.value(),
+            motion_gate=self.motion_gate_check_box.isChecked()
+        )
+        job.thread.error_signal.connect(partial(self.on_error, job))
+        job.thread.finish_signal.connect(partial(self.on_done, job))
+        job.thread.interrupted_signal.connect(partial(self.on_interrupted, job))
+        job.thread.update_signal.connect(partial(self.on_update_progress, job))
+        job.thread.start()
+
+        self.running_jobs.append(job)
+        self.set_job_status(job, 'Обработка')
+
+    def start_jobs(self):
+        while self.pending_jobs and len(self.running_jobs) < self.workers_spin_box.value():
+            self.start_job(self.pending_jobs.popleft())
+
+        if not self.running_jobs:
+            self.on_queue_finished()
+
     def process_video(self):
         input_video = self.video_line_edit.text()
         csv_file = self.csv_output_line_edit.text()
@@ -103,20 +245,17 @@ class OpenposeApp(QtWidgets.QMainWindow, design.Ui_MainWindow):
         if not self.is_valid(input_video, output_video, has_background, model):
             return
 
-        self.process_thread = VideoProcesserThread(
-            video_path=input_video,
-            output_csv=csv_file,
-            output_video=output_video,
-            model=model,
-            show_bg=has_background
-        )
-        self.process_thread.error_signal.connect(self.on_error)
-        self.process_thread.finish_signal.connect(self.on_done)
-        self.process_thread.interrupted_signal.connect(self.on_interrupted)
-        self.process_thread.update_signal.connect(self.on_update_progress)
-        self.process_thread.start()
+        if input_video and input_video not in [job.video_path for job in self.pending_jobs]:
+            self.add_job(input_video, csv_file, output_video if self.save_video_check_box.isChecked() else '')
+        if not self.pending_jobs:
+            return
 
+        self.remove_jobs([job for job in self.jobs if job.is_finished])
+        self.failed_jobs = 0
+        self.is_cancelled = False
+        self.ok_button.setEnabled(False)
         self.cancel_button.setEnabled(True)
+        self.start_jobs()
 
 
 def main():
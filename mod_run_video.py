@@ -7,6 +7,7 @@ import numpy as np
 
 from tf_pose.estimator import TfPoseEstimator
 from tf_pose.networks import get_graph_path, model_wh
+from tf_pose.video import FrameSampler
 
 from PyQt5.QtCore import QThread, pyqtSignal
 
@@ -50,6 +51,10 @@ def setup_parser():
                         help='File for storing key points for each frame')
     parser.add_argument('--output-video', type=str, default='', 
                         help='Output video with key points')
+    parser.add_argument('--stride', type=int, default=1, help='process every Nth frame. default=1')
+    parser.add_argument('--target-fps', type=float, default=0, help='process about this many frames per second of video, 0 for all frames. default=0')
+    parser.add_argument('--start', type=float, default=0, help='start time in seconds. default=0')
+    parser.add_argument('--end', type=float, default=0, help='end time in seconds, 0 for the end of the video. default=0')
     return parser
 
 
@@ -147,6 +152,7 @@ if __name__ == '__main__':
     w, h = model_wh(args.resolution)
     e = TfPoseEstimator(get_graph_path(args.model), target_size=(w, h))
     cap = cv2.VideoCapture(args.video)
+    sampler = FrameSampler(stride=args.stride, target_fps=args.target_fps, start=args.start, end=args.end)
 
     if cap.isOpened() is False:
         print("Error opening video stream or file")
@@ -159,17 +165,12 @@ if __name__ == '__main__':
         output_video = cv2.VideoWriter(
             args.output_video, 
             cv2.VideoWriter_fourcc(*'DIVX'),
-            fps,
+            sampler.get_output_fps(fps),
             (width, height)
     )
 
-    while cap.isOpened():
-        ret_val, image = cap.read()
-
-        try:
-            humans = e.inference(image, resize_to_default=(w > 0 and h > 0), upsample_size=4.0)
-        except Exception:
-            break
+    for frame_idx, image in sampler.read(cap):
+        humans = e.inference(image, resize_to_default=(w > 0 and h > 0), upsample_size=4.0)
 
         print(args.showBG)
         if not args.showBG:
@@ -1,9 +1,16 @@
+import threading
+from queue import Queue, Empty, Full
+
 import cv2
 import numpy as np
-import csv
 
 from tf_pose.estimator import TfPoseEstimator
-from tf_pose.networks import get_graph_path, model_wh
+from tf_pose.keypoints import open_keypoint_writer
+from tf_pose.networks import model_wh
+from tf_pose.registry import get_registry
+from tf_pose.session_config import get_tf_config, set_cpu_affinity
+from tf_pose.sharding import process_video_sharded
+from tf_pose.video import FrameSampler, MotionGate
 
 from PyQt5.QtCore import QThread, pyqtSignal
 
@@ -33,6 +40,14 @@ class WriteCSVException(Exception):
         super(WriteCSVException, self).__init__(message)
 
 
+_QUEUE_TIMEOUT = 0.1
+_END_OF_STREAM = object()
+
+
+class _StageStopped(Exception):
+    pass
+
+
 class VideoProcesserThread(QThread):
 
     error_signal = pyqtSignal(Exception)
@@ -41,7 +56,9 @@ class VideoProcesserThread(QThread):
     update_signal = pyqtSignal(int)
 
     def __init__(self, video_path, output_csv, output_video=None, resolution='432x368',
-        model="mobilenet_thin", show_bg=True):
+        model="mobilenet_thin", show_bg=True, pixel_coords=False, stride=1, target_fps=None, start=None, end=None,
+        motion_gate=False, pixel_threshold=25, motion_threshold=0.005, queue_size=32, batch_size=1, shards=1,
+        intra_op_threads=0, inter_op_threads=0, cpu_cores=None, opt_level='default'):
 
         QThread.__init__(self)
         self.video_path = video_path
@@ -50,6 +67,16 @@ class VideoProcesserThread(QThread):
         self.resolution = resolution
         self.model = model
         self.show_bg = show_bg
+        self.pixel_coords = pixel_coords
+        self.sampler = FrameSampler(stride=stride, target_fps=target_fps, start=start, end=end)
+        self.motion_gate = MotionGate(pixel_threshold, motion_threshold) if motion_gate else None
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.shards = shards
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.cpu_cores = cpu_cores
+        self.opt_level = opt_level
 
         self.is_active = True
 
@@ -57,20 +84,20 @@ class VideoProcesserThread(QThread):
         self.wait()
 
     def __load_model(self, w, h):
+        tf_config = get_tf_config(self.intra_op_threads, self.inter_op_threads, self.opt_level)
         try:
-            return TfPoseEstimator(get_graph_path(self.model), target_size=(w, h))
+            return get_registry().acquire(self.model, (w, h), tf_config)
         except Exception:
             raise ModelError(
                 "Не удалось загрузить модель: {}. Убедитесь, что модель находится в директории models/graph"
                 .format(self.model))
 
-    def __open_csv(self):
+    def __open_keypoints(self, frames_total, width, height):
         try:
-            file_to_save = open(self.output_csv, 'w')
-            writer = csv.writer(file_to_save)
-            return file_to_save, writer
+            return open_keypoint_writer(self.output_csv, capacity=frames_total,
+                                        image_size=(width, height) if self.pixel_coords else None)
         except Exception:
-            raise WriteCSVException("Не удалось открыть файл csv для записи")
+            raise WriteCSVException("Не удалось открыть файл для записи ключевых точек")
 
     def __open_video(self):
         try:
@@ -98,45 +125,163 @@ class VideoProcesserThread(QThread):
         percantage = int(float(current_frame) / float(frames_total) * 100)
         self.update_signal.emit(percantage)
 
-    def run(self):
+    def __is_running(self):
+        return self.is_active and not self.__stop_event.is_set()
+
+    def __put(self, queue, item):
+        while self.__is_running():
+            try:
+                queue.put(item, timeout=_QUEUE_TIMEOUT)
+                return True
+            except Full:
+                continue
+        return False
+
+    def __get(self, queue):
+        while self.__is_running():
+            try:
+                return queue.get(timeout=_QUEUE_TIMEOUT)
+            except Empty:
+                continue
+        raise _StageStopped()
+
+    def __run_stage(self, target, *args):
         try:
-            w, h = model_wh(self.resolution)
-            e = self.__load_model(w, h)
-            cap = self.__open_video()
-
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frames_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            current_frame = 0
-
-            csv_file, csv_writer = self.__open_csv()
-            video_output = self.__open_video_writer(width, height, fps) if self.output_video else None
-
-            while cap.isOpened():
-                if not self.is_active:
-                    raise ProcessingInterruptedException("Работа прервана извне")
+            target(*args)
+        except _StageStopped:
+            pass
+        except Exception as e:
+            if self.__error is None:
+                self.__error = e
+            self.__stop_event.set()
+
+    def __decode(self, cap, frames_queue):
+        for frame_idx, image in self.sampler.read(cap):
+            carried = self.motion_gate is not None and self.motion_gate.is_static(image)
+            if not self.__put(frames_queue, (frame_idx, image, carried)):
+                return
+        self.__put(frames_queue, _END_OF_STREAM)
+
+    def __next_batch(self, frames_queue):
+        batch = [self.__get(frames_queue)]
+        while batch[-1] is not _END_OF_STREAM and len(batch) < self.batch_size:
+            try:
+                batch.append(frames_queue.get_nowait())
+            except Empty:
+                break
+        if batch[-1] is _END_OF_STREAM:
+            return batch[:-1], True
+        return batch, False
+
+    def __infer(self, e, resize_to_default, frames_queue, results_queue):
+        humans = []
+        finished = False
+        while not finished:
+            frames, finished = self.__next_batch(frames_queue)
+            humans_batch = iter(e.inference_batch([image for _, image, carried in frames if not carried],
+                                                  resize_to_default=resize_to_default, upsample_size=4.0))
+            for frame_idx, image, carried in frames:
+                if not carried:
+                    humans = next(humans_batch)
+                if not self.__put(results_queue, (frame_idx, image, humans, carried)):
+                    return
+        self.__put(results_queue, _END_OF_STREAM)
+
+    def __render(self, keypoints_output, video_output, frames_total, results_queue):
+        current_frame = 0
+        while True:
+            item = self.__get(results_queue)
+            if item is _END_OF_STREAM:
+                break
+            frame_idx, image, humans, carried = item
+
+            keypoints_output.write(frame_idx, humans, carried)
+
+            if video_output:
+                if not self.show_bg:
+                    image = np.zeros(image.shape, dtype=np.uint8)
+                image = TfPoseEstimator.draw_humans(image, humans, imgcopy=False)
+                video_output.write(image)
+
+            current_frame += 1
+            self.__update_progress(frames_total, current_frame)
+
+    def __run_pipeline(self, e, resize_to_default, cap, keypoints_output, video_output, frames_total):
+        self.__stop_event = threading.Event()
+        self.__error = None
+
+        frames_queue = Queue(maxsize=self.queue_size)
+        results_queue = Queue(maxsize=self.queue_size)
+        stages = [
+            threading.Thread(target=self.__run_stage, args=(self.__decode, cap, frames_queue)),
+            threading.Thread(target=self.__run_stage,
+                             args=(self.__infer, e, resize_to_default, frames_queue, results_queue)),
+            threading.Thread(target=self.__run_stage,
+                             args=(self.__render, keypoints_output, video_output, frames_total, results_queue)),
+        ]
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+
+        if self.__error is not None:
+            raise self.__error
+        if not self.is_active:
+            raise ProcessingInterruptedException("Работа прервана извне")
+
+    def __process(self, e, resize_to_default):
+        cap = self.__open_video()
+
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frames_total = max(self.sampler.count(fps, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))), 1)
+
+        keypoints_output = self.__open_keypoints(frames_total, width, height)
+        video_output = self.__open_video_writer(width, height, self.sampler.get_output_fps(fps)) \
+            if self.output_video else None
 
-                ret_val, image = cap.read()
-                try:
-                    humans = e.inference(image, resize_to_default=(w > 0 and h > 0), upsample_size=4.0)
-                except Exception:
-                    break
+        try:
+            self.__run_pipeline(e, resize_to_default, cap, keypoints_output, video_output, frames_total)
+        finally:
+            cap.release()
+            if video_output:
+                video_output.release()
+            keypoints_output.close()
+
+    def __process_sharded(self):
+        if self.output_video == '':
+            raise VideoOutputError("Не предоставлено путь к файлу вывода")
+        self.__open_video().release()
 
-                csv_writer.writerow([humans])
+        finished = process_video_sharded(
+            self.video_path, self.output_csv, self.output_video or None, n_shards=self.shards,
+            model=self.model, resolution=self.resolution, show_bg=self.show_bg, pixel_coords=self.pixel_coords,
+            sampler=self.sampler, intra_op_threads=self.intra_op_threads or None, opt_level=self.opt_level,
+            cpu_cores=self.cpu_cores, progress_callback=self.__update_progress_sharded,
+            is_cancelled=lambda: not self.is_active)
+        if not finished:
+            raise ProcessingInterruptedException("Работа прервана извне")
 
-                if not self.show_bg:
-                    image = np.zeros(image.shape)
-                image = TfPoseEstimator.draw_humans(image, humans, imgcopy=False)
+    def __update_progress_sharded(self, current_frame, frames_total):
+        self.__update_progress(max(frames_total, 1), current_frame)
 
-                if video_output:
-                    video_output.write(image)
+    def run(self):
+        try:
+            if self.shards > 1:
+                self.__process_sharded()
+                self.finish_signal.emit()
+                return
 
-                current_frame += 1
-                self.__update_progress(frames_total, current_frame)
+            # pins this thread and the tensorflow pools the session starts from it
+            set_cpu_affinity(self.cpu_cores)
+            w, h = model_wh(self.resolution)
+            e = self.__load_model(w, h)
+            try:
+                self.__process(e, (w > 0 and h > 0))
+            finally:
+                get_registry().release(e)
 
-            video_output.release()
-            csv_file.close()
             cv2.destroyAllWindows()
             self.finish_signal.emit()
 
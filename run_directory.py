@@ -30,6 +30,7 @@ if __name__ == '__main__':
     parser.add_argument('--resolution', type=str, default='432x368', help='network input resolution. default=432x368')
     parser.add_argument('--model', type=str, default='cmu', help='cmu / mobilenet_thin / mobilenet_v2_large / mobilenet_v2_small')
     parser.add_argument('--scales', type=str, default='[None]', help='for multiple scales, eg. [1.0, (1.1, 0.05)]')
+    parser.add_argument('--batch-size', type=int, default=1, help='number of images fed to the network at once. default=1')
     args = parser.parse_args()
     scales = ast.literal_eval(args.scales)
 
@@ -38,20 +39,24 @@ if __name__ == '__main__':
 
     files_grabbed = glob.glob(os.path.join(args.folder, '*.jpg'))
     all_humans = dict()
-    for i, file in enumerate(files_grabbed):
-        # estimate human poses from a single image !
-        image = common.read_imgfile(file, None, None)
+    for batch_start in range(0, len(files_grabbed), args.batch_size):
+        files_batch = files_grabbed[batch_start:batch_start + args.batch_size]
+        images = [common.read_imgfile(file, None, None) for file in files_batch]
         t = time.time()
-        humans = e.inference(image, scales=scales)
+        if scales == [None]:
+            humans_batch = e.inference_batch(images)
+        else:
+            humans_batch = [e.inference(image, scales=scales) for image in images]
         elapsed = time.time() - t
 
-        logger.info('inference image #%d: %s in %.4f seconds.' % (i, file, elapsed))
+        for i, (file, image, humans) in enumerate(zip(files_batch, images, humans_batch), start=batch_start):
+            logger.info('inference image #%d: %s in %.4f seconds.' % (i, file, elapsed / len(files_batch)))
 
-        image = TfPoseEstimator.draw_humans(image, humans, imgcopy=False)
-        cv2.imshow('tf-pose-estimation result', image)
-        cv2.waitKey(5)
+            image = TfPoseEstimator.draw_humans(image, humans, imgcopy=False)
+            cv2.imshow('tf-pose-estimation result', image)
+            cv2.waitKey(5)
 
-        all_humans[file.replace(args.folder, '')] = humans
+            all_humans[file.replace(args.folder, '')] = list(humans)
 
     with open(os.path.join(args.folder, 'pose.dil'), 'wb') as f:
         dill.dump(all_humans, f, protocol=dill.HIGHEST_PROTOCOL)
@@ -6,7 +6,13 @@ import cv2
 import numpy as np
 
 from tf_pose.estimator import TfPoseEstimator
+from tf_pose.keypoints import open_keypoint_writer
 from tf_pose.networks import get_graph_path, model_wh
+from tf_pose.session_config import add_tf_arguments, get_tf_config_from_args, set_cpu_affinity, benchmark, \
+    report_benchmark
+from tf_pose.sharding import process_video_sharded
+from tf_pose.tracking import RoiTracker
+from tf_pose.video import FrameSampler
 
 logger = logging.getLogger('TfPoseEstimator-Video')
 logger.setLevel(logging.DEBUG)
@@ -24,25 +30,77 @@ if __name__ == '__main__':
     parser.add_argument('--video', type=str, default='')
     parser.add_argument('--resolution', type=str, default='432x368', help='network input resolution. default=432x368')
     parser.add_argument('--model', type=str, default='mobilenet_thin', help='cmu / mobilenet_thin / mobilenet_v2_large / mobilenet_v2_small')
+    parser.add_argument('--resize-out-ratio', type=float, default=1.0,
+                        help='if provided, resize heatmaps before they are post-processed. default=1.0')
     parser.add_argument('--show-process', type=bool, default=False,
                         help='for debug purpose, if enabled, speed for inference is dropped.')
     parser.add_argument('--showBG', type=bool, default=True, help='False to show skeleton only.')
+    parser.add_argument('--stride', type=int, default=1, help='process every Nth frame. default=1')
+    parser.add_argument('--target-fps', type=float, default=0, help='process about this many frames per second of video, 0 for all frames. default=0')
+    parser.add_argument('--start', type=float, default=0, help='start time in seconds. default=0')
+    parser.add_argument('--end', type=float, default=0, help='end time in seconds, 0 for the end of the video. default=0')
+    parser.add_argument('--shards', type=int, default=1,
+                        help='split the video between this many worker processes, needs --output-keypoints. default=1')
+    parser.add_argument('--output-keypoints', type=str, default='', help='.csv / .npy / .npz file for keypoints')
+    parser.add_argument('--output-video', type=str, default='', help='file for the rendered video')
+    parser.add_argument('--roi-tracking', type=int, default=0,
+                        help='process only crops around the people of the previous frame, the whole frame every Nth frame. default=0 (off)')
+    parser.add_argument('--letterbox', action='store_true',
+                        help='keep the aspect ratio of the frames and pad them to the network input size')
+    add_tf_arguments(parser)
     args = parser.parse_args()
 
-    logger.debug('initialization %s : %s' % (args.model, get_graph_path(args.model)))
+    sampler = FrameSampler(stride=args.stride, target_fps=args.target_fps, start=args.start, end=args.end)
     w, h = model_wh(args.resolution)
-    e = TfPoseEstimator(get_graph_path(args.model), target_size=(w, h))
+    if args.bench:
+        set_cpu_affinity(args.cpu_cores)
+        cap = cv2.VideoCapture(args.video)
+        images = [image for _, image in zip(range(10), sampler.read(cap))]
+        cap.release()
+        report_benchmark(benchmark(get_graph_path(args.model), (w, h), images, upsample_size=args.resize_out_ratio))
+        raise SystemExit(0)
+
+    if args.shards > 1:
+        if not args.output_keypoints:
+            parser.error('--shards needs --output-keypoints')
+        t = time.time()
+        process_video_sharded(args.video, args.output_keypoints, args.output_video or None, n_shards=args.shards,
+                              model=args.model, resolution=args.resolution, upsample_size=args.resize_out_ratio,
+                              show_bg=args.showBG, sampler=sampler,
+                              intra_op_threads=args.intra_op_threads or None, opt_level=args.opt_level,
+                              cpu_cores=args.cpu_cores,
+                              progress_callback=lambda done, total: logger.debug('frames %d / %d' % (done, total)))
+        logger.info('processed %s in %.2f seconds' % (args.video, time.time() - t))
+        raise SystemExit(0)
+
+    logger.debug('initialization %s : %s' % (args.model, get_graph_path(args.model)))
+    e = TfPoseEstimator(get_graph_path(args.model), target_size=(w, h), tf_config=get_tf_config_from_args(args),
+                        letterbox=args.letterbox)
+    tracker = None
+    if args.roi_tracking > 0:
+        tracker = RoiTracker(e, full_frame_interval=args.roi_tracking, upsample_size=args.resize_out_ratio)
     cap = cv2.VideoCapture(args.video)
 
     if cap.isOpened() is False:
         print("Error opening video stream or file")
-    while cap.isOpened():
-        ret_val, image = cap.read()
-
-        humans = e.inference(image)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    keypoints_output = open_keypoint_writer(args.output_keypoints, capacity=sampler.count(
+        fps, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))) if args.output_keypoints else None
+    video_output = cv2.VideoWriter(args.output_video, cv2.VideoWriter_fourcc(*'DIVX'), sampler.get_output_fps(fps),
+                                   size) if args.output_video else None
+    for frame_idx, image in sampler.read(cap):
+        if tracker is not None:
+            humans = tracker.inference(image)
+        else:
+            humans = e.inference(image, upsample_size=args.resize_out_ratio)
+        if keypoints_output:
+            keypoints_output.write(frame_idx, humans)
         if not args.showBG:
-            image = np.zeros(image.shape)
+            image = np.zeros(image.shape, dtype=np.uint8)
         image = TfPoseEstimator.draw_humans(image, humans, imgcopy=False)
+        if video_output:
+            video_output.write(image)
 
         cv2.putText(image, "FPS: %f" % (1.0 / (time.time() - fps_time)), (10, 10),  cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
         cv2.imshow('tf-pose-estimation result', image)
@@ -50,5 +108,10 @@ if __name__ == '__main__':
         if cv2.waitKey(1) == 27:
             break
 
+    cap.release()
+    if keypoints_output:
+        keypoints_output.close()
+    if video_output:
+        video_output.release()
     cv2.destroyAllWindows()
 logger.debug('finished+')
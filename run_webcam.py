@@ -7,6 +7,9 @@ import numpy as np
 
 from tf_pose.estimator import TfPoseEstimator
 from tf_pose.networks import get_graph_path, model_wh
+from tf_pose.session_config import add_tf_arguments, get_tf_config_from_args, set_cpu_affinity, benchmark, \
+    report_benchmark
+from tf_pose.tracking import RoiTracker
 
 logger = logging.getLogger('TfPoseEstimator-WebCam')
 logger.setLevel(logging.DEBUG)
@@ -31,14 +34,31 @@ if __name__ == '__main__':
     parser.add_argument('--model', type=str, default='mobilenet_thin', help='cmu / mobilenet_thin / mobilenet_v2_large / mobilenet_v2_small')
     parser.add_argument('--show-process', type=bool, default=False,
                         help='for debug purpose, if enabled, speed for inference is dropped.')
+    parser.add_argument('--roi-tracking', type=int, default=0,
+                        help='process only crops around the people of the previous frame, the whole frame every Nth frame. default=0 (off)')
+    parser.add_argument('--letterbox', action='store_true',
+                        help='keep the aspect ratio of the frames and pad them to the network input size')
+    add_tf_arguments(parser)
     args = parser.parse_args()
 
     logger.debug('initialization %s : %s' % (args.model, get_graph_path(args.model)))
     w, h = model_wh(args.resize)
-    if w > 0 and h > 0:
-        e = TfPoseEstimator(get_graph_path(args.model), target_size=(w, h))
-    else:
-        e = TfPoseEstimator(get_graph_path(args.model), target_size=(432, 368))
+    target_size = (w, h) if w > 0 and h > 0 else (432, 368)
+    if args.bench:
+        set_cpu_affinity(args.cpu_cores)
+        cam = cv2.VideoCapture(args.camera)
+        images = [cam.read()[1] for _ in range(10)]
+        cam.release()
+        report_benchmark(benchmark(get_graph_path(args.model), target_size, images,
+                                   resize_to_default=(w > 0 and h > 0), upsample_size=args.resize_out_ratio))
+        raise SystemExit(0)
+
+    e = TfPoseEstimator(get_graph_path(args.model), target_size=target_size, tf_config=get_tf_config_from_args(args),
+                        letterbox=args.letterbox)
+    tracker = None
+    if args.roi_tracking > 0:
+        tracker = RoiTracker(e, full_frame_interval=args.roi_tracking, resize_to_default=(w > 0 and h > 0),
+                             upsample_size=args.resize_out_ratio)
     logger.debug('cam read+')
     cam = cv2.VideoCapture(args.camera)
     ret_val, image = cam.read()
@@ -48,7 +68,10 @@ if __name__ == '__main__':
         ret_val, image = cam.read()
 
         logger.debug('image process+')
-        humans = e.inference(image, resize_to_default=(w > 0 and h > 0), upsample_size=args.resize_out_ratio)
+        if tracker is not None:
+            humans = tracker.inference(image)
+        else:
+            humans = e.inference(image, resize_to_default=(w > 0 and h > 0), upsample_size=args.resize_out_ratio)
 
         logger.debug('postprocess+')
         image = TfPoseEstimator.draw_humans(image, humans, imgcopy=False)
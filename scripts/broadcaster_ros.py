@@ -12,24 +12,27 @@ from std_msgs.msg import String
 from sensor_msgs.msg import Image
 from tfpose_ros.msg import Persons, Person, BodyPartElm
 
-from tf_pose.estimator import TfPoseEstimator
+from tf_pose.estimator import TfPoseEstimator, HumanBatch
 from tf_pose.networks import model_wh, get_graph_path
+from tf_pose.session_config import get_tf_config, set_cpu_affinity
 
 
 def humans_to_msg(humans):
     persons = Persons()
 
-    for human in humans:
+    humans = HumanBatch.from_humans(humans)
+    for keypoints, valid in zip(humans.keypoints.tolist(), humans.valid.tolist()):
         person = Person()
 
-        for k in human.body_parts:
-            body_part = human.body_parts[k]
+        for part_idx, (x, y, score) in enumerate(keypoints):
+            if not valid[part_idx]:
+                continue
 
             body_part_msg = BodyPartElm()
-            body_part_msg.part_id = body_part.part_idx
-            body_part_msg.x = body_part.x
-            body_part_msg.y = body_part.y
-            body_part_msg.confidence = body_part.score
+            body_part_msg.part_id = part_idx
+            body_part_msg.x = x
+            body_part_msg.y = y
+            body_part_msg.confidence = score
             person.body_part.append(body_part_msg)
         persons.persons.append(person)
 
@@ -71,6 +74,10 @@ if __name__ == '__main__':
 
     resolution = rospy.get_param('~resolution', '432x368')
     resize_out_ratio = float(rospy.get_param('~resize_out_ratio', '4.0'))
+    intra_op_threads = int(rospy.get_param('~intra_op_threads', 0))
+    inter_op_threads = int(rospy.get_param('~inter_op_threads', 0))
+    cpu_cores = str(rospy.get_param('~cpu_cores', ''))
+    opt_level = rospy.get_param('~opt_level', 'default')
     tf_lock = Lock()
 
     if not image_topic:
@@ -87,7 +94,14 @@ if __name__ == '__main__':
         rospy.logerr('invalid model: %s, e=%s' % (model, e))
         sys.exit(-1)
 
-    pose_estimator = TfPoseEstimator(graph_path, target_size=(w, h))
+    try:
+        set_cpu_affinity(cpu_cores)
+        tf_config = get_tf_config(intra_op_threads, inter_op_threads, opt_level)
+    except Exception as e:
+        rospy.logerr('invalid session parameters, e=%s' % e)
+        sys.exit(-1)
+
+    pose_estimator = TfPoseEstimator(graph_path, target_size=(w, h), tf_config=tf_config)
     cv_bridge = CvBridge()
 
     rospy.Subscriber(image_topic, Image, callback_image, queue_size=1, buff_size=2**24)
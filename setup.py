@@ -40,7 +40,10 @@ EXT = Extension('_pafprocess',
                     'tf_pose/pafprocess/pafprocess.cpp',
                 ],
                 swig_opts=['-c++'],
-                include_dirs=[np.get_include()])
+                include_dirs=[np.get_include()],
+                # pafprocess scores limbs on std::thread
+                extra_compile_args=['-std=c++11', '-pthread'] if os.name != 'nt' else [],
+                extra_link_args=['-pthread'] if os.name != 'nt' else [])
 
 setuptools.setup(
     name='tf-pose',
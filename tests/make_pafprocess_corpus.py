@@ -0,0 +1,98 @@
+"""
+Regenerate tests/data/pafprocess/*.npz, the regression corpus of test_pafprocess.py.
+
+The heatmaps and part affinity fields are synthetic: skeletons drawn from a template at random positions and sizes.
+The expected humans are those of the pafprocess build at hand, only regenerate them on purpose.
+
+    python tests/make_pafprocess_corpus.py
+"""
+import os
+
+import cv2
+import numpy as np
+
+from tf_pose.common import CocoPairs
+from tf_pose.pafprocess import pafprocess
+from tf_pose.peaks import THRESH_HEAT
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pafprocess')
+
+# paf channels of CocoPairs, COCOPAIRS_NET in pafprocess.h
+PAF_CHANNELS = ((12, 13), (20, 21), (14, 15), (16, 17), (22, 23), (24, 25), (0, 1), (2, 3), (4, 5), (6, 7), (8, 9),
+                (10, 11), (28, 29), (30, 31), (34, 35), (32, 33), (36, 37), (18, 19), (26, 27))
+
+# (x, y) of the 18 parts in a unit box
+TEMPLATE = np.array([(0.5, 0.1), (0.5, 0.25), (0.35, 0.25), (0.3, 0.45), (0.28, 0.6), (0.65, 0.25), (0.7, 0.45),
+                     (0.72, 0.6), (0.4, 0.6), (0.4, 0.8), (0.4, 0.98), (0.6, 0.6), (0.6, 0.8), (0.6, 0.98),
+                     (0.45, 0.07), (0.55, 0.07), (0.4, 0.09), (0.6, 0.09)])
+
+# name, (h, w), humans, size range relative to h
+CASES = (
+    ('few', (46, 54), 3, (0.4, 0.9)),
+    ('overlap', (46, 54), 8, (0.3, 0.7)),
+    ('crowd', (92, 108), 32, (0.15, 0.4)),
+)
+
+
+def make_maps(rng, size, n_humans, size_range):
+    h, w = size
+    heat = np.zeros((h, w, 19), dtype=np.float32)
+    paf = np.zeros((h, w, 38), dtype=np.float32)
+    yy, xx = np.mgrid[:h, :w]
+    for _ in range(n_humans):
+        human_size = rng.uniform(*size_range) * h
+        origin = rng.uniform(0, w - human_size * 0.8), rng.uniform(0, h - human_size)
+        parts = TEMPLATE * human_size + origin + rng.normal(0, 0.4, TEMPLATE.shape)
+        visible = rng.uniform(size=18) > 0.1
+        for part_idx in np.flatnonzero(visible):
+            x, y = parts[part_idx]
+            heat[:, :, part_idx] += np.exp(-((xx - x) ** 2 + (yy - y) ** 2) / 2.0) * rng.uniform(0.4, 1.0)
+        for (part_a, part_b), (paf_x, paf_y) in zip(CocoPairs, PAF_CHANNELS):
+            vec = parts[part_b] - parts[part_a]
+            norm = np.linalg.norm(vec)
+            if not (visible[part_a] and visible[part_b]) or norm < 1e-6:
+                continue
+            vec /= norm
+            dx, dy = xx - parts[part_a, 0], yy - parts[part_a, 1]
+            along, across = dx * vec[0] + dy * vec[1], np.abs(dx * vec[1] - dy * vec[0])
+            limb = (along >= -1) & (along <= norm + 1) & (across <= 1.5)
+            paf[:, :, paf_x][limb] = vec[0]
+            paf[:, :, paf_y][limb] = vec[1]
+    heat[:, :, 18] = np.clip(1.0 - heat[:, :, :18].max(axis=2), 0, 1)
+    return np.clip(heat, 0, 1), paf
+
+
+def get_peaks(heat):
+    # 3x3 maxima as n x (part index, y, x, heat), ordered by y, x per part
+    peaks = []
+    for part_idx in range(18):
+        channel = heat[:, :, part_idx]
+        is_peak = (channel == cv2.dilate(channel, np.ones((3, 3), np.uint8))) & (channel > THRESH_HEAT)
+        peaks.extend((part_idx, y, x, channel[y, x]) for y, x in zip(*np.nonzero(is_peak)))
+    return np.array(peaks, dtype=np.float32).reshape(-1, 4)
+
+
+def get_dense_peaks(peaks, shape):
+    dense = np.zeros(shape, dtype=np.float32)
+    part_ids, ys, xs = peaks[:, 0].astype(int), peaks[:, 1].astype(int), peaks[:, 2].astype(int)
+    dense[ys, xs, part_ids] = peaks[:, 3]
+    return dense
+
+
+def main():
+    if not os.path.isdir(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    rng = np.random.RandomState(2019)
+    for name, size, n_humans, size_range in CASES:
+        heat, paf = make_maps(rng, size, n_humans, size_range)
+        peaks = get_peaks(heat)
+        keypoints, scores = pafprocess.process_paf(get_dense_peaks(peaks, heat.shape), heat, paf, 0.0, 1)
+        sparse_keypoints, sparse_scores = pafprocess.process_paf_sparse(peaks, paf, size[0], size[1], 0.0, 1)
+        np.savez_compressed(os.path.join(DATA_DIR, name + '.npz'), heat=heat, paf=paf, peaks=peaks,
+                            keypoints=keypoints, scores=scores,
+                            sparse_keypoints=sparse_keypoints, sparse_scores=sparse_scores)
+        print('%s : %d peaks, %d humans, %d humans sparse' % (name, len(peaks), len(scores), len(sparse_scores)))
+
+
+if __name__ == '__main__':
+    main()
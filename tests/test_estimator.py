@@ -0,0 +1,61 @@
+import numpy as np
+
+from tf_pose.estimator import HumanBatch, ImageBuffer, TfPoseEstimator, _get_letterbox, _merge_windows
+
+
+def test_lazy_warmup_runs_once_for_first_size():
+    e = TfPoseEstimator.__new__(TfPoseEstimator)
+    e.lazy_warmup = True
+    calls = []
+    e.warmup = lambda upsample_sizes, batch_size=1: calls.append((tuple(upsample_sizes), batch_size))
+
+    e._warmup_once(4.0, 2)
+    e._warmup_once(8.0)
+
+    assert calls == [((4.0,), 2)]
+
+
+def test_merge_windows_averages_overlap():
+    outputs = np.stack([np.full((4, 4, 2), 1.0, dtype=np.float32), np.full((4, 4, 2), 3.0, dtype=np.float32)])
+    merged = _merge_windows(outputs, [(0.0, 0.0, 0.75, 1.0), (0.5, 0.0, 0.5, 0.5)], (8, 8))
+
+    assert merged.shape == (8, 8, 2)
+    np.testing.assert_allclose(merged[:, :4], 1.0)
+    np.testing.assert_allclose(merged[:4, 4:6], 2.0)
+    np.testing.assert_allclose(merged[4:, 4:6], 1.0)
+    np.testing.assert_allclose(merged[:4, 6:], 3.0)
+    np.testing.assert_allclose(merged[4:, 6:], 0.0)
+
+
+def test_merge_windows_past_the_image():
+    # a letterboxed window: 2 columns of padding on both sides of an image 8 columns wide
+    output = np.tile(np.arange(12, dtype=np.float32)[None, :, None], (8, 1, 2))
+    merged = _merge_windows(output[None], [(-0.25, 0.0, 1.5, 1.0)], (8, 8))
+
+    np.testing.assert_allclose(merged[:, :, 0], np.tile(np.arange(2, 10, dtype=np.float32), (8, 1)))
+
+
+def test_get_letterbox():
+    assert _get_letterbox(640, 480, 432, 368) == (0, 22, 432, 324)
+    assert _get_letterbox(480, 640, 432, 368) == (78, 0, 276, 368)
+    assert _get_letterbox(864, 736, 432, 368) == (0, 0, 432, 368)
+    assert _get_letterbox(10000, 10, 432, 368) == (0, 183, 432, 1)
+
+
+def test_letterbox_fill_and_map_back():
+    npimg = np.full((480, 640, 3), 200, dtype=np.uint8)
+    image_buffer = ImageBuffer(letterbox=True)
+    batch = image_buffer.fill([npimg], (432, 368))
+    x, y, box_w, box_h = image_buffer.get_box(640, 480, 432, 368)
+
+    assert (x, y, box_w, box_h) == (0, 22, 432, 324)
+    assert (batch[0, :y] == 0).all() and (batch[0, y + box_h:] == 0).all()
+    np.testing.assert_allclose(batch[0, y:y + box_h], 200)
+
+    # parts found in the network input, mapped back as inference_batch does
+    image_points = np.array([[0.0, 0.0], [0.25, 0.5], [1.0, 1.0]], dtype=np.float32)
+    network_points = (image_points * (box_w, box_h) + (x, y)) / (432, 368)
+    keypoints = np.concatenate([network_points, np.ones((3, 1), dtype=np.float32)], axis=1)[None]
+    humans = HumanBatch(keypoints, np.ones(1, dtype=np.float32))
+    mapped = humans.transform(-x / float(box_w), -y / float(box_h), 432 / float(box_w), 368 / float(box_h))
+    np.testing.assert_allclose(mapped.coords[0], image_points, atol=1e-6)
@@ -0,0 +1,59 @@
+import numpy as np
+
+from tf_pose.estimator import BodyPart, Human, HumanBatch
+
+
+def _humans():
+    humans = []
+    for human_id, part_ids in enumerate(([0, 1, 2, 5, 17], [1, 8, 11], [])):
+        human = Human([])
+        for part_idx in part_ids:
+            x, y, score = (part_idx + 0.5) / 18.0, 0.25 * human_id + 0.125, 0.5 + 0.01 * part_idx
+            human.body_parts[part_idx] = BodyPart('%d-%d' % (human_id, part_idx), part_idx, x, y, score)
+        human.score = 1.0 + human_id
+        humans.append(human)
+    return humans
+
+
+def _assert_same_humans(humans, others):
+    assert len(humans) == len(others)
+    for human, other in zip(humans, others):
+        assert sorted(human.body_parts) == sorted(other.body_parts)
+        for part_idx, part in human.body_parts.items():
+            other_part = other.body_parts[part_idx]
+            assert other_part.part_idx == part_idx
+            np.testing.assert_allclose((other_part.x, other_part.y, other_part.score),
+                                       (part.x, part.y, part.score), rtol=1e-6)
+        np.testing.assert_allclose(other.score, human.score, rtol=1e-6)
+
+
+def test_from_humans_to_humans():
+    humans = _humans()
+    batch = HumanBatch.from_humans(humans)
+
+    assert len(batch) == 3
+    assert batch.keypoints.shape == (3, 18, 3)
+    assert np.isnan(batch.keypoints[2]).all()
+    np.testing.assert_allclose(batch.scores, [1.0, 2.0, 3.0])
+    assert batch.to_humans() == humans
+    assert HumanBatch.from_humans(batch) is batch
+
+
+def test_arrays_to_humans_and_back():
+    batch = HumanBatch.from_humans(_humans())
+    rebuilt = HumanBatch(batch.keypoints.copy(), batch.scores.copy())
+
+    _assert_same_humans(_humans(), rebuilt)
+    _assert_same_humans(_humans(), list(rebuilt))
+    assert rebuilt[1].body_parts[8].uidx == '1-8'
+
+    packed = HumanBatch.from_humans(list(rebuilt))
+    np.testing.assert_array_equal(packed.keypoints, batch.keypoints)
+    np.testing.assert_array_equal(packed.scores, batch.scores)
+
+
+def test_empty():
+    batch = HumanBatch.from_humans([])
+    assert len(batch) == 0
+    assert batch.keypoints.shape == (0, 18, 3)
+    assert batch.to_humans() == []
@@ -0,0 +1,24 @@
+import numpy as np
+
+from tf_pose.estimator import ImageBuffer, TfPoseEstimator
+
+
+def test_quantize_matches_quantize_img():
+    rng = np.random.RandomState(0)
+    npimg = rng.randint(0, 256, size=(48, 64, 3)).astype(np.uint8)
+
+    batch = ImageBuffer(quantize=True).fill([npimg])
+
+    assert batch.dtype == np.uint8
+    assert batch[0].tobytes() == TfPoseEstimator._quantize_img(npimg).tobytes()
+
+
+def test_float_input_is_copied():
+    rng = np.random.RandomState(0)
+    npimg = rng.randint(0, 256, size=(48, 64, 3)).astype(np.uint8)
+
+    batch = ImageBuffer(dtype=np.float32).fill([npimg, npimg[::-1]])
+
+    assert batch.shape == (2, 48, 64, 3)
+    np.testing.assert_array_equal(batch[0], npimg.astype(np.float32))
+    np.testing.assert_array_equal(batch[1], npimg[::-1].astype(np.float32))
@@ -0,0 +1,104 @@
+import csv
+
+import numpy as np
+import pytest
+
+from tf_pose.estimator import HumanBatch
+from tf_pose.keypoints import CsvKeypointWriter, KeypointWriter, load_keypoints, merge_keypoint_files
+
+
+def _batch(scores, seed=0):
+    rng = np.random.RandomState(seed)
+    keypoints = rng.uniform(size=(len(scores), 18, 3)).astype(np.float32)
+    keypoints[rng.uniform(size=(len(scores), 18)) < 0.3] = np.nan
+    return HumanBatch(keypoints, np.array(scores, dtype=np.float32))
+
+
+def test_writer_keeps_best_humans(tmp_path):
+    batch = _batch([0.5, 0.9, 0.1, 0.7])
+    path = str(tmp_path / 'keypoints.npz')
+    with KeypointWriter(path, capacity=1, max_humans=2) as writer:
+        writer.write(0, batch)
+        writer.write(1, batch.to_humans()[:1])
+        writer.write(2, [])
+    assert writer.dropped_humans == 2
+
+    keypoints, index = load_keypoints(path)
+    np.testing.assert_array_equal(index, [(0, 2, 0), (1, 1, 0), (2, 0, 0)])
+    np.testing.assert_array_equal(keypoints[0], batch.keypoints[[1, 3]])
+    np.testing.assert_array_equal(keypoints[1, 0], batch.keypoints[0])
+    assert np.isnan(keypoints[1, 1]).all()
+    assert np.isnan(keypoints[2]).all()
+
+
+def test_csv_writer_rows(tmp_path):
+    batch = _batch([0.5, 0.9])
+    path = str(tmp_path / 'keypoints.csv')
+    with CsvKeypointWriter(path, image_size=(640, 480)) as writer:
+        writer.write(3, batch, carried=True)
+        writer.write(4, batch.to_humans())
+
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert tuple(rows[0]) == CsvKeypointWriter.HEADER
+
+    expected = []
+    for frame_idx, carried in ((3, 1), (4, 0)):
+        for human_id, human in enumerate(batch.to_humans()):
+            for part_idx, part in sorted(human.body_parts.items()):
+                expected.append([frame_idx, human_id, part_idx, round(part.x * 640, 4), round(part.y * 480, 4),
+                                 round(part.score, 4), carried])
+    assert len(rows) - 1 == len(expected)
+    for row, expected_row in zip(rows[1:], expected):
+        assert [int(v) for v in row[:3]] + [int(row[6])] == expected_row[:3] + expected_row[6:]
+        np.testing.assert_allclose([float(v) for v in row[3:6]], expected_row[3:6], atol=1e-4)
+
+
+def test_npy_writer_grows_and_loads(tmp_path):
+    path = str(tmp_path / 'keypoints.npy')
+    batches = [_batch([0.5] * (i % 3), seed=i) for i in range(5)]
+    with KeypointWriter(path, capacity=2, max_humans=3) as writer:
+        for frame_idx, batch in enumerate(batches):
+            writer.write(frame_idx * 2, batch, carried=frame_idx == 3)
+
+    keypoints, index = load_keypoints(path)
+    assert isinstance(keypoints, np.memmap)
+    assert keypoints.shape == (5, 3, 18, 3)
+    np.testing.assert_array_equal(index[:, 0], [0, 2, 4, 6, 8])
+    np.testing.assert_array_equal(index[:, 1], [0, 1, 2, 0, 1])
+    np.testing.assert_array_equal(index[:, 2], [0, 0, 0, 1, 0])
+    for row, batch in zip(keypoints, batches):
+        np.testing.assert_array_equal(row[:len(batch)], batch.keypoints)
+        assert np.isnan(row[len(batch):]).all()
+
+
+@pytest.mark.parametrize('ext', ['.npy', '.npz'])
+def test_merge_binary_files(tmp_path, ext):
+    paths = [str(tmp_path / ('part%d%s' % (i, ext))) for i in range(3)]
+    for i, path in enumerate(paths):
+        with KeypointWriter(path, capacity=1, max_humans=2) as writer:
+            for frame_idx in range(i + 1):
+                writer.write(10 * i + frame_idx, _batch([0.5, 0.6], seed=frame_idx))
+    output_path = str(tmp_path / ('merged' + ext))
+
+    merge_keypoint_files(paths, output_path)
+
+    keypoints, index = load_keypoints(output_path)
+    parts = [load_keypoints(path) for path in paths]
+    np.testing.assert_array_equal(index[:, 0], [0, 10, 11, 20, 21, 22])
+    np.testing.assert_array_equal(keypoints, np.concatenate([part_keypoints for part_keypoints, _ in parts]))
+
+
+def test_merge_csv_files(tmp_path):
+    paths = [str(tmp_path / ('part%d.csv' % i)) for i in range(2)]
+    for i, path in enumerate(paths):
+        with CsvKeypointWriter(path) as writer:
+            writer.write(i, _batch([0.5], seed=i))
+    output_path = str(tmp_path / 'merged.csv')
+
+    merge_keypoint_files(paths, output_path)
+
+    with open(output_path) as f:
+        merged = f.read().splitlines()
+    parts = [open(path).read().splitlines() for path in paths]
+    assert merged == parts[0] + parts[1][1:]
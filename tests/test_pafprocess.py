@@ -0,0 +1,46 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from tf_pose.pafprocess import pafprocess
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pafprocess')
+CASES = sorted(glob.glob(os.path.join(DATA_DIR, '*.npz')))
+
+
+def _dense_peaks(peaks, shape):
+    dense = np.zeros(shape, dtype=np.float32)
+    part_ids, ys, xs = peaks[:, 0].astype(int), peaks[:, 1].astype(int), peaks[:, 2].astype(int)
+    dense[ys, xs, part_ids] = peaks[:, 3]
+    return dense
+
+
+def _load(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def test_corpus_has_crowd():
+    assert max(len(_load(path)['scores']) for path in CASES) >= 30
+
+
+@pytest.mark.parametrize('n_threads', [1, 4])
+@pytest.mark.parametrize('path', CASES, ids=[os.path.basename(path) for path in CASES])
+def test_process_paf(path, n_threads):
+    case = _load(path)
+    keypoints, scores = pafprocess.process_paf(_dense_peaks(case['peaks'], case['heat'].shape), case['heat'],
+                                               case['paf'], 0.0, n_threads)
+    np.testing.assert_array_equal(keypoints, case['keypoints'])
+    np.testing.assert_array_equal(scores, case['scores'])
+
+
+@pytest.mark.parametrize('n_threads', [1, 4])
+@pytest.mark.parametrize('path', CASES, ids=[os.path.basename(path) for path in CASES])
+def test_process_paf_sparse(path, n_threads):
+    case = _load(path)
+    h, w = case['heat'].shape[:2]
+    keypoints, scores = pafprocess.process_paf_sparse(case['peaks'], case['paf'], h, w, 0.0, n_threads)
+    np.testing.assert_array_equal(keypoints, case['sparse_keypoints'])
+    np.testing.assert_array_equal(scores, case['sparse_scores'])
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+from tf_pose.peaks import THRESH_HEAT, find_peaks, upsample_patch
+
+
+def _kernel(size=25, sigma=4.0):
+    kernel = cv2.getGaussianKernel(size, sigma)
+    return np.outer(kernel, kernel).astype(np.float32)
+
+
+def _heatmap(h=46, w=54):
+    # blobs of every part, some of them close enough to merge at network resolution
+    rng = np.random.RandomState(0)
+    yy, xx = np.mgrid[:h, :w]
+    heat = (rng.uniform(size=(h, w, 19)) * 0.02).astype(np.float32)
+    for part_idx in range(18):
+        for _ in range(6):
+            y, x, peak = rng.uniform(2, h - 2), rng.uniform(2, w - 2), rng.uniform(0.3, 1.0)
+            heat[:, :, part_idx] += peak * np.exp(-((xx - x) ** 2 + (yy - y) ** 2) / 2.0)
+    return np.clip(heat, 0, 1)
+
+
+def _dense_peaks(heat_mat, upsample_size, kernel):
+    # what the graph does for sparse_peaks=False, with a bilinear upsampling
+    heat_up = cv2.resize(heat_mat, (upsample_size[1], upsample_size[0]), interpolation=cv2.INTER_LINEAR)
+    peaks = []
+    for part_idx in range(18):
+        smoothed = cv2.filter2D(heat_up[:, :, part_idx], -1, kernel, borderType=cv2.BORDER_CONSTANT)
+        is_peak = (smoothed == cv2.dilate(smoothed, np.ones((3, 3), np.uint8))) & (smoothed > THRESH_HEAT)
+        for y, x in zip(*np.nonzero(is_peak)):
+            peaks.append((part_idx, y, x, heat_up[y, x, part_idx]))
+    return np.array(peaks, dtype=np.float32).reshape(-1, 4)
+
+
+def test_upsample_patch_matches_resize():
+    heat = _heatmap()[:, :, 0]
+    heat_up = cv2.resize(heat, (54 * 4, 46 * 4), interpolation=cv2.INTER_LINEAR)
+    np.testing.assert_allclose(upsample_patch(heat, 4.0, 4.0, 10, 50, 0, 30), heat_up[10:50, 0:30], atol=1e-5)
+
+
+def test_sparse_peaks_match_dense():
+    heat_mat, kernel = _heatmap(), _kernel()
+    for upsample_size in ((46 * 4, 54 * 4), (46 * 2, 54 * 2), (100, 130)):
+        sparse = find_peaks(heat_mat, upsample_size, kernel)
+        dense = _dense_peaks(heat_mat, upsample_size, kernel)
+
+        assert len(sparse) > 18
+        np.testing.assert_array_equal(sparse[:, :3], dense[:, :3])
+        np.testing.assert_allclose(sparse[:, 3], dense[:, 3], atol=1e-5)
+
+
+def test_no_peaks():
+    peaks = find_peaks(np.zeros((46, 54, 19), dtype=np.float32), (184, 216), _kernel())
+    assert peaks.shape == (0, 4)
@@ -0,0 +1,61 @@
+import pytest
+
+from tf_pose import registry
+from tf_pose.registry import ModelRegistry
+
+
+class _Estimator:
+    def __init__(self, graph_path, target_size, tf_config=None):
+        self.graph_path = graph_path
+        self.target_size = target_size
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_estimator(monkeypatch):
+    # no graph is loaded, the registry only manages the instances
+    monkeypatch.setattr(registry, 'TfPoseEstimator', _Estimator)
+    monkeypatch.setattr(registry, 'get_graph_path', lambda model: model + '.pb')
+
+
+def test_shared_and_refcounted():
+    models = ModelRegistry(capacity=1)
+    e1 = models.acquire('cmu', (432, 368))
+    e2 = models.acquire('cmu', [432, 368])
+    assert e1 is e2
+    assert e1.graph_path == 'cmu.pb'
+
+    # over capacity, but held
+    e3 = models.acquire('mobilenet_thin', (432, 368))
+    models.release(e1)
+    assert not e1.closed
+    models.release(e2)
+    assert e1.closed
+    assert not e3.closed
+
+
+def test_lru_eviction():
+    models = ModelRegistry(capacity=2)
+    estimators = {}
+    for model in ('a', 'b', 'a', 'c'):
+        with models.estimator(model, (320, 240)) as estimator:
+            estimators.setdefault(model, estimator)
+            assert estimators[model] is estimator
+
+    # 'b' was used least recently
+    assert [estimators[model].closed for model in 'abc'] == [False, True, False]
+    assert models.acquire('b', (320, 240)) is not estimators['b']
+
+
+def test_clear_keeps_held():
+    models = ModelRegistry()
+    held = models.acquire('a', (320, 240))
+    with models.estimator('b', (320, 240)) as free:
+        pass
+    models.clear()
+    assert free.closed
+    assert not held.closed
+    assert models.acquire('a', (320, 240)) is held
@@ -0,0 +1,22 @@
+import pytest
+
+from tf_pose.session_config import parse_cores
+
+
+@pytest.mark.parametrize('cores, expected', [
+    (None, None),
+    ('', None),
+    ([], None),
+    ('3', [3]),
+    ('0-3,6', [0, 1, 2, 3, 6]),
+    ('6, 0-1,1', [0, 1, 6]),
+    ('2-2,', [2]),
+    ([3, 1, 3], [1, 3]),
+])
+def test_parse_cores(cores, expected):
+    assert parse_cores(cores) == expected
+
+
+def test_parse_cores_invalid():
+    with pytest.raises(ValueError):
+        parse_cores('a-b')
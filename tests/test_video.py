@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import pytest
+
+from tf_pose.video import FrameSampler, MotionGate
+
+FPS = 10.0
+FRAMES = 30
+
+
+@pytest.fixture(scope='module')
+def video_path(tmp_path_factory):
+    # every frame is filled with 8 * its frame number
+    path = str(tmp_path_factory.mktemp('video') / 'frames.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), FPS, (32, 24))
+    for frame_idx in range(FRAMES):
+        writer.write(np.full((24, 32, 3), 8 * frame_idx, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.mark.parametrize('kwargs, frames', [
+    ({}, list(range(30))),
+    ({'stride': 4}, list(range(0, 30, 4))),
+    ({'target_fps': 4}, [0, 3, 5, 8, 10, 13, 15, 18, 20, 23, 25, 28]),
+    ({'target_fps': 20}, list(range(30))),
+    ({'start': 1.0, 'end': 2.0}, list(range(10, 21))),
+    ({'stride': 3, 'start': 0.5, 'end': 2.2}, [5, 8, 11, 14, 17, 20]),
+    ({'start': 5.0}, []),
+])
+def test_get_frames(kwargs, frames):
+    sampler = FrameSampler(**kwargs)
+    assert sampler.get_frames(FPS, FRAMES) == frames
+    assert sampler.count(FPS, FRAMES) == len(frames)
+
+
+def test_output_fps():
+    assert FrameSampler(stride=2).get_output_fps(30.0) == 15.0
+    assert FrameSampler(target_fps=5).get_output_fps(30.0) == 5.0
+    assert FrameSampler(stride=10, target_fps=5).get_output_fps(30.0) == 3.0
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'stride': 4}, {'target_fps': 4}, {'stride': 3, 'start': 0.5, 'end': 2.2}])
+def test_read(video_path, kwargs):
+    sampler = FrameSampler(**kwargs)
+    cap = cv2.VideoCapture(video_path)
+    try:
+        frames = list(sampler.read(cap))
+    finally:
+        cap.release()
+
+    assert [frame_idx for frame_idx, _ in frames] == sampler.get_frames(FPS, FRAMES)
+    for frame_idx, image in frames:
+        assert abs(float(image.mean()) - 8 * frame_idx) < 2
+
+
+def test_motion_gate():
+    gate = MotionGate(pixel_threshold=25, motion_threshold=0.01, width=64)
+    frame = np.full((240, 320, 3), 100, dtype=np.uint8)
+
+    assert not gate.is_static(frame)
+    assert gate.is_static(frame)
+    # noise below pixel_threshold
+    assert gate.is_static(frame + np.uint8(10))
+
+    # compared with the last frame let through, so slow changes add up
+    assert gate.is_static(frame + np.uint8(20))
+    assert not gate.is_static(frame + np.uint8(30))
+
+    moved = frame + np.uint8(30)
+    moved[100:140, 150:190] = 255
+    assert not gate.is_static(moved)
+    assert gate.is_static(moved)
+
+    # a different size is never static
+    assert not gate.is_static(np.full((120, 320, 3), 100, dtype=np.uint8))
+    assert (gate.inferred, gate.skipped) == (4, 4)
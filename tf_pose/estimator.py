@@ -1,5 +1,7 @@
 import logging
 import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import slidingwindow as sw
 
@@ -10,6 +12,7 @@ import time
 
 from tf_pose import common
 from tf_pose.common import CocoPart
+from tf_pose.peaks import find_peaks, THRESH_HEAT
 from tf_pose.tensblur.smoother import Smoother
 
 try:
@@ -40,6 +43,76 @@ def _include_part(part_list, part_idx):
     return False, None
 
 
+_THRESHOLD_FACE_CONFIDENCE = 0.2
+
+
+def _get_face_box(parts, img_w, img_h, mode=0):
+    """
+    Face box of one human, shared by Human.get_face_box and HumanBatch.get_face_boxes
+    :param parts: {part index: (x, y)} of the parts confident enough to be used
+    """
+    # SEE : https://github.com/ildoonet/tf-pose-estimation/blob/master/tf_pose/common.py#L13
+    part_nose = parts.get(CocoPart.Nose.value)
+    if part_nose is None:
+        return None
+    part_neck = parts.get(CocoPart.Neck.value)
+    part_reye, part_leye = parts.get(CocoPart.REye.value), parts.get(CocoPart.LEye.value)
+    part_rear, part_lear = parts.get(CocoPart.REar.value), parts.get(CocoPart.LEar.value)
+    is_reye, is_leye = part_reye is not None, part_leye is not None
+
+    size = 0
+    if part_neck is not None:
+        size = max(size, img_h * (part_neck[1] - part_nose[1]) * 0.8)
+
+    if is_reye and is_leye:
+        size = max(size, img_w * (part_reye[0] - part_leye[0]) * 2.0)
+        size = max(size,
+                   img_w * math.sqrt((part_reye[0] - part_leye[0]) ** 2 + (part_reye[1] - part_leye[1]) ** 2) * 2.0)
+
+    if mode == 1:
+        if not is_reye and not is_leye:
+            return None
+
+    if part_rear is not None and part_lear is not None:
+        size = max(size, img_w * (part_rear[0] - part_lear[0]) * 1.6)
+
+    if size <= 0:
+        return None
+
+    if not is_reye and is_leye:
+        x = part_nose[0] * img_w - (size // 3 * 2)
+    elif is_reye and not is_leye:
+        x = part_nose[0] * img_w - (size // 3)
+    else:  # is_reye and is_leye:
+        x = part_nose[0] * img_w - size // 2
+
+    x2 = x + size
+    if mode == 0:
+        y = part_nose[1] * img_h - size // 3
+    else:
+        y = part_nose[1] * img_h - _round(size / 2 * 1.2)
+    y2 = y + size
+
+    # fit into the image frame
+    x = max(0, x)
+    y = max(0, y)
+    x2 = min(img_w - x, x2 - x) + x
+    y2 = min(img_h - y, y2 - y) + y
+
+    if _round(x2 - x) == 0.0 or _round(y2 - y) == 0.0:
+        return None
+    if mode == 0:
+        return {"x": _round((x + x2) / 2),
+                "y": _round((y + y2) / 2),
+                "w": _round(x2 - x),
+                "h": _round(y2 - y)}
+    else:
+        return {"x": _round(x),
+                "y": _round(y),
+                "w": _round(x2 - x),
+                "h": _round(y2 - y)}
+
+
 class Human:
     """
     body_parts: list of BodyPart
@@ -90,77 +163,9 @@ class Human:
         :param mode:
         :return:
         """
-        # SEE : https://github.com/ildoonet/tf-pose-estimation/blob/master/tf_pose/common.py#L13
-        _NOSE = CocoPart.Nose.value
-        _NECK = CocoPart.Neck.value
-        _REye = CocoPart.REye.value
-        _LEye = CocoPart.LEye.value
-        _REar = CocoPart.REar.value
-        _LEar = CocoPart.LEar.value
-
-        _THRESHOLD_PART_CONFIDENCE = 0.2
-        parts = [part for idx, part in self.body_parts.items() if part.score > _THRESHOLD_PART_CONFIDENCE]
-
-        is_nose, part_nose = _include_part(parts, _NOSE)
-        if not is_nose:
-            return None
-
-        size = 0
-        is_neck, part_neck = _include_part(parts, _NECK)
-        if is_neck:
-            size = max(size, img_h * (part_neck.y - part_nose.y) * 0.8)
-
-        is_reye, part_reye = _include_part(parts, _REye)
-        is_leye, part_leye = _include_part(parts, _LEye)
-        if is_reye and is_leye:
-            size = max(size, img_w * (part_reye.x - part_leye.x) * 2.0)
-            size = max(size,
-                       img_w * math.sqrt((part_reye.x - part_leye.x) ** 2 + (part_reye.y - part_leye.y) ** 2) * 2.0)
-
-        if mode == 1:
-            if not is_reye and not is_leye:
-                return None
-
-        is_rear, part_rear = _include_part(parts, _REar)
-        is_lear, part_lear = _include_part(parts, _LEar)
-        if is_rear and is_lear:
-            size = max(size, img_w * (part_rear.x - part_lear.x) * 1.6)
-
-        if size <= 0:
-            return None
-
-        if not is_reye and is_leye:
-            x = part_nose.x * img_w - (size // 3 * 2)
-        elif is_reye and not is_leye:
-            x = part_nose.x * img_w - (size // 3)
-        else:  # is_reye and is_leye:
-            x = part_nose.x * img_w - size // 2
-
-        x2 = x + size
-        if mode == 0:
-            y = part_nose.y * img_h - size // 3
-        else:
-            y = part_nose.y * img_h - _round(size / 2 * 1.2)
-        y2 = y + size
-
-        # fit into the image frame
-        x = max(0, x)
-        y = max(0, y)
-        x2 = min(img_w - x, x2 - x) + x
-        y2 = min(img_h - y, y2 - y) + y
-
-        if _round(x2 - x) == 0.0 or _round(y2 - y) == 0.0:
-            return None
-        if mode == 0:
-            return {"x": _round((x + x2) / 2),
-                    "y": _round((y + y2) / 2),
-                    "w": _round(x2 - x),
-                    "h": _round(y2 - y)}
-        else:
-            return {"x": _round(x),
-                    "y": _round(y),
-                    "w": _round(x2 - x),
-                    "h": _round(y2 - y)}
+        parts = {idx: (part.x, part.y) for idx, part in self.body_parts.items()
+                 if part.score > _THRESHOLD_FACE_CONFIDENCE}
+        return _get_face_box(parts, img_w, img_h, mode)
 
     def get_upper_body_box(self, img_w, img_h):
         """
@@ -265,45 +270,282 @@ class BodyPart:
         return self.__str__()
 
 
+class HumanBatch:
+    """
+    Humans found in one image, kept as the arrays pafprocess returns. Behaves as a list of Human, the Human and
+    BodyPart objects are only built when first accessed.
+
+    keypoints : float32 array of n x 18 x (x, y, score), coordinates normalized to the image, NaN for missing parts
+    scores : float32 array of n human scores
+    coords, part_scores, valid : views of keypoints, n x 18 x (x, y) / n x 18 / n x 18 mask of the detected parts
+    """
+    __slots__ = ('keypoints', 'scores', '_humans')
+
+    def __init__(self, keypoints, scores):
+        self.keypoints = keypoints
+        self.scores = scores
+        self._humans = None
+
+    @staticmethod
+    def from_humans(humans):
+        """
+        Pack a list of Human into arrays, a HumanBatch is returned as is. The Human objects are kept for to_humans().
+        """
+        if isinstance(humans, HumanBatch):
+            return humans
+
+        keypoints = np.full((len(humans), CocoPart.Background.value, 3), np.nan, dtype=np.float32)
+        for human_id, human in enumerate(humans):
+            for part_idx, body_part in human.body_parts.items():
+                keypoints[human_id, part_idx] = (body_part.x, body_part.y, body_part.score)
+        batch = HumanBatch(keypoints, np.array([human.score for human in humans], dtype=np.float32))
+        batch._humans = list(humans)
+        return batch
+
+    @property
+    def coords(self):
+        return self.keypoints[..., :2]
+
+    @property
+    def part_scores(self):
+        return self.keypoints[..., 2]
+
+    @property
+    def valid(self):
+        return ~np.isnan(self.keypoints[..., 2])
+
+    def get_pixel_coords(self, img_w, img_h):
+        """
+        Rounded pixel coordinates, as draw_humans places the parts
+        :return: int32 array of n x 18 x (x, y), -1 for missing parts
+        """
+        coords = self.coords.astype(np.float64) * (img_w, img_h) + 0.5
+        return np.where(self.valid[..., None], coords, -1).astype(np.int32)
+
+    def transform(self, offset_x, offset_y, scale_x, scale_y):
+        """
+        Humans with the coordinates mapped to offset + coordinate * scale, e.g. from a crop to the whole image
+        :return: new HumanBatch
+        """
+        keypoints = self.keypoints.copy()
+        keypoints[..., 0] = offset_x + keypoints[..., 0] * scale_x
+        keypoints[..., 1] = offset_y + keypoints[..., 1] * scale_y
+        return HumanBatch(keypoints, self.scores)
+
+    def get_face_boxes(self, img_w, img_h, mode=0):
+        """
+        Human.get_face_box of every human, without building Human objects
+        :return: list of box dicts, None where no face was found
+        """
+        confident = (np.nan_to_num(self.part_scores) > _THRESHOLD_FACE_CONFIDENCE).tolist()
+        coords = self.coords.tolist()
+        return [_get_face_box({idx: xy for idx, xy in enumerate(human) if mask[idx]}, img_w, img_h, mode)
+                for human, mask in zip(coords, confident)]
+
+    def to_humans(self):
+        if self._humans is None:
+            self._humans = [self._build_human(human_id) for human_id in range(len(self.scores))]
+        return self._humans
+
+    def _build_human(self, human_id):
+        human = Human([])
+        for part_idx in np.flatnonzero(~np.isnan(self.keypoints[human_id, :, 2])).tolist():
+            x, y, score = self.keypoints[human_id, part_idx].tolist()
+            human.body_parts[part_idx] = BodyPart('%d-%d' % (human_id, part_idx), part_idx, x, y, score)
+        human.score = float(self.scores[human_id])
+        return human
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __getitem__(self, idx):
+        return self.to_humans()[idx]
+
+    def __iter__(self):
+        return iter(self.to_humans())
+
+    def __str__(self):
+        return str(self.to_humans())
+
+    def __repr__(self):
+        return self.__str__()
+
+
 class PoseEstimator:
     def __init__(self):
         pass
 
     @staticmethod
-    def estimate_paf(peaks, heat_mat, paf_mat):
-        pafprocess.process_paf(peaks, heat_mat, paf_mat)
+    def estimate_paf(peaks, heat_mat, paf_mat, max_limb_length=0.0, n_threads=1):
+        """
+        :param max_limb_length: peaks farther apart than this fraction of the heatmap height are never connected,
+                                0 scores every pair
+        :param n_threads: threads scoring the 19 limbs in parallel, worth it with many peaks (crowds, large
+                          upsample_size). The humans are assembled serially, the result does not depend on it.
+        :return: HumanBatch
+        """
+        return HumanBatch(*pafprocess.process_paf(peaks, heat_mat, paf_mat, max_limb_length, n_threads))
 
-        humans = []
-        for human_id in range(pafprocess.get_num_humans()):
-            human = Human([])
-            is_added = False
+    @staticmethod
+    def estimate_paf_sparse(peaks, paf_mat, heat_size, max_limb_length=0.0, n_threads=1):
+        """
+        Same as estimate_paf for peaks given as coordinates, the part affinity fields are interpolated.
+        :param peaks: float32 array of n x (part index, y, x, heat score) in heatmap pixels, ordered by y, x per part
+        :param paf_mat: part affinity fields at any resolution, e.g. the network output
+        :param heat_size: (h, w) of the heatmap the peaks were found in
+        :return: HumanBatch
+        """
+        return HumanBatch(*pafprocess.process_paf_sparse(peaks, paf_mat, heat_size[0], heat_size[1],
+                                                         max_limb_length, n_threads))
 
-            for part_idx in range(18):
-                c_idx = int(pafprocess.get_part_cid(human_id, part_idx))
-                if c_idx < 0:
-                    continue
 
-                is_added = True
-                human.body_parts[part_idx] = BodyPart(
-                    '%d-%d' % (human_id, part_idx), part_idx,
-                    float(pafprocess.get_part_x(c_idx)) / heat_mat.shape[1],
-                    float(pafprocess.get_part_y(c_idx)) / heat_mat.shape[0],
-                    pafprocess.get_part_score(c_idx)
-                )
+def _get_letterbox(img_w, img_h, w, h):
+    # (x, y, w, h) of the image scaled into w x h with its aspect ratio kept, centered between the padding
+    scale = min(w / float(img_w), h / float(img_h))
+    box_w, box_h = min(max(int(round(img_w * scale)), 1), w), min(max(int(round(img_h * scale)), 1), h)
+    return (w - box_w) // 2, (h - box_h) // 2, box_w, box_h
 
-            if is_added:
-                score = pafprocess.get_score(human_id)
-                human.score = score
-                humans.append(human)
 
-        return humans
+def _merge_windows(outputs, ratios, size):
+    """
+    Average the network outputs of windows into one map of the whole image, as slidingwindow.Merging.mergeWindows
+    does: every window is resized onto its part of the map and overlapping cells are averaged.
+    :param outputs: n x h x w x c network outputs
+    :param ratios: (x, y, w, h) of every window relative to the image, see _get_scaled_img
+    :param size: (h, w) of the merged map
+    :return: h x w x c map, 0 where no window covers the image
+    """
+    h, w = size
+    merged = np.zeros((h, w, outputs.shape[3]), dtype=np.float32)
+    weights = np.zeros((h, w, 1), dtype=np.float32)
+    for output, (ratio_x, ratio_y, ratio_w, ratio_h) in zip(outputs, ratios):
+        x0, y0 = int(round(ratio_x * w)), int(round(ratio_y * h))
+        box_w, box_h = max(int(round(ratio_w * w)), 1), max(int(round(ratio_h * h)), 1)
+        window = cv2.resize(output, (box_w, box_h), interpolation=cv2.INTER_LINEAR)
+        # windows over the zero padding of small or letterboxed images reach past the image
+        x1, y1 = min(x0 + box_w, w), min(y0 + box_h, h)
+        cx, cy = max(-x0, 0), max(-y0, 0)
+        merged[y0 + cy:y1, x0 + cx:x1] += window[cy:y1 - y0, cx:x1 - x0]
+        weights[y0 + cy:y1, x0 + cx:x1] += 1.0
+    return merged / np.maximum(weights, 1.0)
+
+
+class ImageBuffer:
+    """
+    Preallocated network input of n x h x w x 3 in the dtype the graph takes. Images are resized into it and it is
+    reused between calls, only a larger batch or another input size allocates a new buffer. Every thread gets its
+    own buffers, so an estimator can be shared by several threads.
+
+    interpolation : cv2 interpolation of the resize, INTER_LINEAR is cheaper than INTER_CUBIC and INTER_AREA
+                    avoids aliasing when large frames are shrunk
+    dtype : numpy dtype of the input tensor, uint8 images are converted while they are copied in
+    quantize : the graph takes quint8 input, images in [-1, 1] are mapped to [0, 255] after the resize
+    letterbox : keep the aspect ratio of the images, the rest of the input is zero padding, also for quantized
+                input. get_box() tells where an image was placed.
+    """
 
+    def __init__(self, interpolation=cv2.INTER_CUBIC, dtype=np.float32, quantize=False, letterbox=False):
+        self.interpolation = interpolation
+        self.dtype = np.uint8 if quantize else dtype
+        self.quantize = quantize
+        self.letterbox = letterbox
+        self._local = threading.local()
+
+    def get_box(self, img_w, img_h, w, h):
+        """
+        (x, y, w, h) pixels of the w x h input covered by an image of img_w x img_h
+        """
+        if not self.letterbox:
+            return 0, 0, w, h
+        return _get_letterbox(img_w, img_h, w, h)
+
+    def _get_buffer(self, name, shape, dtype):
+        # buffers of the calling thread, a buffer with more rows than needed is reused through a view
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape[0] < shape[0] or buffer.shape[1:] != shape[1:] or buffer.dtype != dtype:
+            logger.debug('image buffer %s=%s' % (name, 'x'.join(str(d) for d in shape)))
+            buffer = buffers[name] = np.empty(shape, dtype=dtype)
+        return buffer[:shape[0]]
+
+    def _convert(self, npimg, out):
+        # copy an image of the size of out into it, in the input dtype
+        if not self.quantize:
+            np.copyto(out, npimg, casting='unsafe')
+            return
+
+        # exactly TfPoseEstimator._quantize_img, without temporaries
+        scaled = self._get_buffer('quantize', npimg.shape, np.result_type(npimg, 1.0))
+        np.add(npimg, 1.0, out=scaled)
+        np.true_divide(scaled, 2.0 / 2 ** 8, out=scaled)
+        np.copyto(out, scaled, casting='unsafe')
+
+    def fill(self, npimgs, size=None):
+        """
+        :param npimgs: list of images
+        :param size: (w, h) to resize the images to. None keeps their size, they must then have the same shape.
+        :return: n x h x w x 3 view of the buffer of the calling thread, overwritten by its next call
+        """
+        if size is None:
+            if any(npimg.shape != npimgs[0].shape for npimg in npimgs):
+                raise Exception('Images in a batch should have the same shape. Use resize_to_default=True.')
+            h, w = npimgs[0].shape[:2]
+        else:
+            w, h = size
+
+        batch = self._get_buffer('input', (len(npimgs), h, w, 3), self.dtype)
+        for npimg, out in zip(npimgs, batch):
+            x, y, box_w, box_h = self.get_box(npimg.shape[1], npimg.shape[0], w, h)
+            if (box_w, box_h) != (w, h):
+                # the padding is 0 of the fed dtype, as _get_scaled_img pads, and is cleared every time because
+                # the previous image may have been placed elsewhere
+                out[:y] = 0
+                out[y + box_h:] = 0
+                out[y:y + box_h, :x] = 0
+                out[y:y + box_h, x + box_w:] = 0
+            if npimg.shape[:2] != (box_h, box_w):
+                # cv2 needs a contiguous destination of the dtype of the image, the resize goes through a buffer
+                resized = self._get_buffer('resized', (box_h, box_w, 3), npimg.dtype)
+                cv2.resize(npimg, (box_w, box_h), dst=resized, interpolation=self.interpolation)
+                npimg = resized
+            self._convert(npimg, out[y:y + box_h, x:x + box_w])
+        return batch
 
-class TfPoseEstimator:
-    # TODO : multi-scale
 
-    def __init__(self, graph_path, target_size=(320, 240), tf_config=None):
+class TfPoseEstimator:
+    def __init__(self, graph_path, target_size=(320, 240), tf_config=None, sparse_peaks=False, smooth_size=25,
+                 smooth_sigma=3.0, separable_smoothing=True, lean=False, paf_workers=1, max_limb_length=0.0,
+                 paf_threads=1, interpolation=cv2.INTER_CUBIC, letterbox=False, warmup_sizes='lazy'):
+        """
+        :param sparse_peaks: search peaks at network resolution and upsample and smooth only around them
+                             (tf_pose.peaks) instead of upsampling and smoothing all maps in the graph. The part
+                             affinity fields are interpolated as in lean mode, heatMat / pafMat keep the network output.
+        :param smooth_size: size of the gaussian filter applied to the upsampled heatmap before peak search
+        :param smooth_sigma: its width in sigmas, see Smoother.gauss_kernel
+        :param separable_smoothing: apply the filter as two 1-d passes
+        :param lean: fetch only the peak coordinates found in the graph and the network output, the part affinity
+                     fields are interpolated instead of being upsampled. heatMat / pafMat then keep the network output.
+        :param paf_workers: threads assembling the humans of the images in a batch concurrently
+        :param max_limb_length: see PoseEstimator.estimate_paf, skips scoring far apart peaks in crowded images
+        :param paf_threads: threads scoring the limbs of one image, see PoseEstimator.estimate_paf
+        :param interpolation: cv2 interpolation resizing the images to target_size, see ImageBuffer
+        :param letterbox: resize_to_default keeps the aspect ratio of the images and pads them to target_size.
+                          The humans are mapped back to the image, heatMat / pafMat keep the padded layout.
+        :param warmup_sizes: upsample_size values run once on a blank image before returning, see warmup().
+                             'lazy' warms up only the upsample_size of the first inference call, before running it.
+                             None / () skips the warm-up, the first inference call then sets up the session.
+        """
         self.target_size = target_size
+        self.sparse_peaks = sparse_peaks
+        self.lean = lean
+        self.paf_pool = ThreadPoolExecutor(paf_workers) if paf_workers > 1 else None
+        self.max_limb_length = max_limb_length
+        self.paf_threads = paf_threads
+        self.peak_kernel = Smoother.gauss_kernel(smooth_size, smooth_sigma)[:, :, 0, 0]
+        self.interpolation = interpolation
+        self.letterbox = letterbox
 
         # load graph
         logger.info('loading graph from %s(default size=%dx%d)' % (graph_path, target_size[0], target_size[1]))
@@ -311,61 +553,47 @@ class TfPoseEstimator:
             graph_def = tf.GraphDef()
             graph_def.ParseFromString(f.read())
 
-        self.graph = tf.get_default_graph()
-        tf.import_graph_def(graph_def, name='TfPoseEstimator')
-        self.persistent_sess = tf.Session(graph=self.graph, config=tf_config)
-
-        # for op in self.graph.get_operations():
-        #     print(op.name)
-        # for ts in [n.name for n in tf.get_default_graph().as_graph_def().node]:
-        #     print(ts)
-
-        self.tensor_image = self.graph.get_tensor_by_name('TfPoseEstimator/image:0')
-        self.tensor_output = self.graph.get_tensor_by_name('TfPoseEstimator/Openpose/concat_stage7:0')
-        self.tensor_heatMat = self.tensor_output[:, :, :, :19]
-        self.tensor_pafMat = self.tensor_output[:, :, :, 19:]
-        self.upsample_size = tf.placeholder(dtype=tf.int32, shape=(2,), name='upsample_size')
-        self.tensor_heatMat_up = tf.image.resize_area(self.tensor_output[:, :, :, :19], self.upsample_size,
-                                                      align_corners=False, name='upsample_heatmat')
-        self.tensor_pafMat_up = tf.image.resize_area(self.tensor_output[:, :, :, 19:], self.upsample_size,
-                                                     align_corners=False, name='upsample_pafmat')
-        smoother = Smoother({'data': self.tensor_heatMat_up}, 25, 3.0)
-        gaussian_heatMat = smoother.get_output()
-
-        max_pooled_in_tensor = tf.nn.pool(gaussian_heatMat, window_shape=(3, 3), pooling_type='MAX', padding='SAME')
-        self.tensor_peaks = tf.where(tf.equal(gaussian_heatMat, max_pooled_in_tensor), gaussian_heatMat,
-                                     tf.zeros_like(gaussian_heatMat))
-
-        self.heatMat = self.pafMat = None
-
-        # warm-up
-        self.persistent_sess.run(tf.variables_initializer(
-            [v for v in tf.global_variables() if
-             v.name.split(':')[0] in [x.decode('utf-8') for x in
-                                      self.persistent_sess.run(tf.report_uninitialized_variables())]
-             ])
-        )
-        self.persistent_sess.run(
-            [self.tensor_peaks, self.tensor_heatMat_up, self.tensor_pafMat_up],
-            feed_dict={
-                self.tensor_image: [np.ndarray(shape=(target_size[1], target_size[0], 3), dtype=np.float32)],
-                self.upsample_size: [target_size[1], target_size[0]]
-            }
-        )
-        self.persistent_sess.run(
-            [self.tensor_peaks, self.tensor_heatMat_up, self.tensor_pafMat_up],
-            feed_dict={
-                self.tensor_image: [np.ndarray(shape=(target_size[1], target_size[0], 3), dtype=np.float32)],
-                self.upsample_size: [target_size[1] // 2, target_size[0] // 2]
-            }
-        )
-        self.persistent_sess.run(
-            [self.tensor_peaks, self.tensor_heatMat_up, self.tensor_pafMat_up],
-            feed_dict={
-                self.tensor_image: [np.ndarray(shape=(target_size[1], target_size[0], 3), dtype=np.float32)],
-                self.upsample_size: [target_size[1] // 4, target_size[0] // 4]
-            }
-        )
+        # every estimator owns its graph, so several models can live side by side in one process
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            tf.import_graph_def(graph_def, name='TfPoseEstimator')
+            self.persistent_sess = tf.Session(graph=self.graph, config=tf_config)
+
+            # for op in self.graph.get_operations():
+            #     print(op.name)
+            # for ts in [n.name for n in tf.get_default_graph().as_graph_def().node]:
+            #     print(ts)
+
+            self.tensor_image = self.graph.get_tensor_by_name('TfPoseEstimator/image:0')
+            self.tensor_output = self.graph.get_tensor_by_name('TfPoseEstimator/Openpose/concat_stage7:0')
+            self.tensor_heatMat = self.tensor_output[:, :, :, :19]
+            self.tensor_pafMat = self.tensor_output[:, :, :, 19:]
+            self.upsample_size = tf.placeholder(dtype=tf.int32, shape=(2,), name='upsample_size')
+            self.tensor_heatMat_up = tf.image.resize_area(self.tensor_output[:, :, :, :19], self.upsample_size,
+                                                          align_corners=False, name='upsample_heatmat')
+            self.tensor_pafMat_up = tf.image.resize_area(self.tensor_output[:, :, :, 19:], self.upsample_size,
+                                                         align_corners=False, name='upsample_pafmat')
+            smoother = Smoother({'data': self.tensor_heatMat_up}, smooth_size, smooth_sigma, separable_smoothing)
+            gaussian_heatMat = smoother.get_output()
+
+            max_pooled_in_tensor = tf.nn.pool(gaussian_heatMat, window_shape=(3, 3), pooling_type='MAX',
+                                              padding='SAME')
+            self.tensor_peaks = tf.where(tf.equal(gaussian_heatMat, max_pooled_in_tensor), gaussian_heatMat,
+                                         tf.zeros_like(gaussian_heatMat))
+
+            # lean mode : (image, y, x, part) of the peaks and their heat, in the order pafprocess numbers them
+            self.tensor_peak_coords = tf.where(tf.greater(self.tensor_peaks[:, :, :, :18], THRESH_HEAT))
+            self.tensor_peak_scores = tf.gather_nd(self.tensor_heatMat_up, self.tensor_peak_coords)
+
+            self.heatMat = self.pafMat = None
+
+        # quint8 graphs are fed uint8, ImageBuffer ignores the dtype when it quantizes
+        self.image_buffer = ImageBuffer(interpolation, dtype=self.tensor_image.dtype.as_numpy_dtype,
+                                        quantize=self.tensor_image.dtype == tf.quint8, letterbox=letterbox)
+
+        self.lazy_warmup = warmup_sizes == 'lazy'
+        if warmup_sizes and not self.lazy_warmup:
+            self.warmup(warmup_sizes)
 
         # logs
         if self.tensor_image.dtype == tf.quint8:
@@ -375,6 +603,40 @@ class TfPoseEstimator:
         # self.persistent_sess.close()
         pass
 
+    def warmup(self, upsample_sizes=(8.0, 4.0, 2.0), batch_size=1):
+        """
+        Run the graph on a blank batch once per upsample size, so the first frames do not pay for setting up the
+        session. Only the sizes used later are worth warming up.
+        :param upsample_sizes: upsample_size values as passed to inference(), 8.0 upsamples to target_size
+        :param batch_size:
+        """
+        target_w, target_h = self.target_size
+        if self.lean:
+            fetches = [self.tensor_peak_coords, self.tensor_peak_scores, self.tensor_output]
+        elif self.sparse_peaks:
+            fetches = [self.tensor_output]
+        else:
+            fetches = [self.tensor_peaks, self.tensor_heatMat_up, self.tensor_pafMat_up]
+        imgs = np.zeros((batch_size, target_h, target_w, 3), dtype=self.image_buffer.dtype)
+        for upsample_size in upsample_sizes:
+            t = time.time()
+            self.persistent_sess.run(fetches, feed_dict={
+                self.tensor_image: imgs,
+                self.upsample_size: [int(target_h / 8 * upsample_size), int(target_w / 8 * upsample_size)]
+            })
+            logger.debug('warm-up upsample_size=%.2f time=%.5f' % (upsample_size, time.time() - t))
+
+    def _warmup_once(self, upsample_size, batch_size=1):
+        # warmup_sizes='lazy' : the first inference call warms up the size it asks for
+        if self.lazy_warmup:
+            self.lazy_warmup = False
+            self.warmup((upsample_size,), batch_size)
+
+    def close(self):
+        self.persistent_sess.close()
+        if self.paf_pool is not None:
+            self.paf_pool.shutdown()
+
     def get_flops(self):
         flops = tf.profiler.profile(self.graph, options=tf.profiler.ProfileOptionBuilder.float_operation())
         return flops.total_float_ops
@@ -392,25 +654,21 @@ class TfPoseEstimator:
         if imgcopy:
             npimg = np.copy(npimg)
         image_h, image_w = npimg.shape[:2]
-        centers = {}
-        for human in humans:
+        humans = HumanBatch.from_humans(humans)
+        for centers, valid in zip(humans.get_pixel_coords(image_w, image_h).tolist(), humans.valid.tolist()):
             # draw point
             for i in range(common.CocoPart.Background.value):
-                if i not in human.body_parts.keys():
+                if not valid[i]:
                     continue
-
-                body_part = human.body_parts[i]
-                center = (int(body_part.x * image_w + 0.5), int(body_part.y * image_h + 0.5))
-                centers[i] = center
-                cv2.circle(npimg, center, 3, common.CocoColors[i], thickness=3, lineType=8, shift=0)
+                cv2.circle(npimg, tuple(centers[i]), 3, common.CocoColors[i], thickness=3, lineType=8, shift=0)
 
             # draw line
             for pair_order, pair in enumerate(common.CocoPairsRender):
-                if pair[0] not in human.body_parts.keys() or pair[1] not in human.body_parts.keys():
+                if not valid[pair[0]] or not valid[pair[1]]:
                     continue
 
                 # npimg = cv2.line(npimg, centers[pair[0]], centers[pair[1]], common.CocoColors[pair_order], 3)
-                cv2.line(npimg, centers[pair[0]], centers[pair[1]], common.CocoColors[pair_order], 3)
+                cv2.line(npimg, tuple(centers[pair[0]]), tuple(centers[pair[1]]), common.CocoColors[pair_order], 3)
 
         return npimg
 
@@ -419,10 +677,20 @@ class TfPoseEstimator:
         img_h, img_w = npimg.shape[:2]
 
         if scale is None:
-            if npimg.shape[:2] != (self.target_size[1], self.target_size[0]):
+            if npimg.shape[:2] == (self.target_size[1], self.target_size[0]):
+                return [npimg], [(0.0, 0.0, 1.0, 1.0)]
+            if not self.letterbox:
                 # resize
-                npimg = cv2.resize(npimg, self.target_size, interpolation=cv2.INTER_CUBIC)
-            return [npimg], [(0.0, 0.0, 1.0, 1.0)]
+                npimg = cv2.resize(npimg, self.target_size, interpolation=self.interpolation)
+                return [npimg], [(0.0, 0.0, 1.0, 1.0)]
+
+            # resize keeping the aspect ratio, the window reaches past the image over the padding. The image is
+            # already quantized here, the padding is 0 of the fed dtype as in ImageBuffer.
+            x, y, box_w, box_h = _get_letterbox(img_w, img_h, self.target_size[0], self.target_size[1])
+            npblank = np.zeros((self.target_size[1], self.target_size[0], 3), dtype=npimg.dtype)
+            npblank[y:y + box_h, x:x + box_w] = cv2.resize(npimg, (box_w, box_h), interpolation=self.interpolation)
+            return [npblank], [(-x / float(box_w), -y / float(box_h),
+                                self.target_size[0] / float(box_w), self.target_size[1] / float(box_h))]
         elif isinstance(scale, float):
             # scaling with center crop
             base_scale = get_base_scale(scale, img_w, img_h)
@@ -502,63 +770,210 @@ class TfPoseEstimator:
     def _crop_roi(self, npimg, ratio_x, ratio_y):
         target_w, target_h = self.target_size
         h, w = npimg.shape[:2]
+        # a negative ratio places the image that far inside the window, over padding, as _merge_windows expects
+        copy_x = int(round(-w * ratio_x)) if ratio_x < 0 else 0
+        copy_y = int(round(-h * ratio_y)) if ratio_y < 0 else 0
         x = max(int(w * ratio_x - .5), 0)
         y = max(int(h * ratio_y - .5), 0)
-        cropped = npimg[y:y + target_h, x:x + target_w]
+        cropped = npimg[y:y + target_h - copy_y, x:x + target_w - copy_x]
 
         cropped_h, cropped_w = cropped.shape[:2]
         if cropped_w < target_w or cropped_h < target_h:
-            npblank = np.zeros((self.target_size[1], self.target_size[0], 3), dtype=np.uint8)
-
-            copy_x, copy_y = (target_w - cropped_w) // 2, (target_h - cropped_h) // 2
+            npblank = np.zeros((self.target_size[1], self.target_size[0], 3), dtype=npimg.dtype)
             npblank[copy_y:copy_y + cropped_h, copy_x:copy_x + cropped_w] = cropped
+            return npblank
         else:
             return cropped
 
-    def inference(self, npimg, resize_to_default=True, upsample_size=1.0):
+    def _prepare_img(self, npimg, resize_to_default):
         if npimg is None:
             raise Exception('The image is not valid. Please check your image exists.')
 
-        if resize_to_default:
-            upsample_size = [int(self.target_size[1] / 8 * upsample_size), int(self.target_size[0] / 8 * upsample_size)]
-        else:
-            upsample_size = [int(npimg.shape[0] / 8 * upsample_size), int(npimg.shape[1] / 8 * upsample_size)]
-
         if self.tensor_image.dtype == tf.quint8:
             # quantize input image
             npimg = TfPoseEstimator._quantize_img(npimg)
-            pass
 
         logger.debug('inference+ original shape=%dx%d' % (npimg.shape[1], npimg.shape[0]))
-        img = npimg
         if resize_to_default:
-            img = self._get_scaled_img(npimg, None)[0][0]
+            npimg = self._get_scaled_img(npimg, None)[0][0]
+        return npimg
+
+    def inference(self, npimg, resize_to_default=True, upsample_size=1.0, scales=None):
+        """
+        :param scales: list of scales for multi-scale inference, each one as accepted by _get_scaled_img, e.g.
+                       [None, 2.0, (1.5, 0.2)]. The whole image is run once at target_size by default.
+        """
+        self._warmup_once(upsample_size)
+        if scales is not None:
+            return self._inference_multi_scale(npimg, scales, upsample_size)
+        return self.inference_batch([npimg], resize_to_default=resize_to_default, upsample_size=upsample_size)[0]
+
+    def inference_rois(self, npimg, rois, upsample_size=1.0):
+        """
+        Run the network on crops of one image in a single batch, e.g. around the humans of the previous frame.
+        Every crop is resized to target_size, so small people get more network pixels than in the whole frame.
+        :param rois: list of (x, y, w, h) crops relative to the image size, as the ratios of _get_scaled_img
+        :return: HumanBatch of the humans of all crops, coordinates relative to the whole image
+        """
+        img_h, img_w = npimg.shape[:2]
+        boxes = []
+        for ratio_x, ratio_y, ratio_w, ratio_h in rois:
+            x, y = int(round(ratio_x * img_w)), int(round(ratio_y * img_h))
+            boxes.append((x, y, min(max(int(round(ratio_w * img_w)), 1), img_w - x),
+                          min(max(int(round(ratio_h * img_h)), 1), img_h - y)))
+        humans_batch = self.inference_batch([npimg[y:y + h, x:x + w] for x, y, w, h in boxes],
+                                            resize_to_default=True, upsample_size=upsample_size)
+
+        keypoints = [np.zeros((0, CocoPart.Background.value, 3), dtype=np.float32)]
+        scores = [np.zeros(0, dtype=np.float32)]
+        for (x, y, w, h), humans in zip(boxes, humans_batch):
+            humans = HumanBatch.from_humans(humans).transform(x / float(img_w), y / float(img_h),
+                                                              w / float(img_w), h / float(img_h))
+            keypoints.append(humans.keypoints)
+            scores.append(humans.scores)
+        return HumanBatch(np.concatenate(keypoints), np.concatenate(scores))
+
+    def _inference_multi_scale(self, npimg, scales, upsample_size):
+        # windows of every scale go through the network in one batch
+        npimg = self._prepare_img(npimg, resize_to_default=False)
+        rois, ratios = [], []
+        for scale in scales:
+            scale_rois, scale_ratios = self._get_scaled_img(npimg, scale)
+            rois.extend(scale_rois)
+            ratios.extend(scale_ratios)
+        output = self.persistent_sess.run(self.tensor_output, feed_dict={self.tensor_image: rois})
+
+        # the merged maps take the resolution of the finest window, so zoomed in scales keep their detail
+        out_h, out_w = output.shape[1:3]
+        merged_h = int(max(out_h / ratio_h for _, _, _, ratio_h in ratios) * upsample_size)
+        merged_w = int(max(out_w / ratio_w for _, _, ratio_w, _ in ratios) * upsample_size)
+        merged = _merge_windows(output, ratios, (merged_h, merged_w))
+        self.heatMat, self.pafMat = merged[:, :, :19], merged[:, :, 19:]
+        logger.debug('inference- windows=%d heatMat=%dx%d' % (len(rois), merged_w, merged_h))
+
+        # smoothing and peak search of the graph, fed with the merged heatmap
+        peaks = self.persistent_sess.run(self.tensor_peaks, feed_dict={self.tensor_heatMat_up: self.heatMat[None]})
+        return PoseEstimator.estimate_paf(peaks[0], self.heatMat, self.pafMat, self.max_limb_length,
+                                          self.paf_threads)
+
+    def inference_batch(self, npimgs, resize_to_default=True, upsample_size=1.0):
+        """
+        Run the network once for several images and estimate humans for each of them.
+        :param npimgs: list of images. Without resize_to_default all of them must have the same shape.
+        :param resize_to_default:
+        :param upsample_size:
+        :return: list of humans per image, in the order of npimgs
+        """
+        if len(npimgs) == 0:
+            return []
+
+        if any(npimg is None for npimg in npimgs):
+            raise Exception('The image is not valid. Please check your image exists.')
+        self._warmup_once(upsample_size, len(npimgs))
+        logger.debug('inference+ original shape=%dx%d' % (npimgs[0].shape[1], npimgs[0].shape[0]))
+        imgs = self.image_buffer.fill(npimgs, self.target_size if resize_to_default else None)
+
+        img_h, img_w = imgs[0].shape[:2]
+        upsample_size = [int(img_h / 8 * upsample_size), int(img_w / 8 * upsample_size)]
+        if self.lean:
+            humans_batch = self._inference_lean(imgs, upsample_size)
+        elif self.sparse_peaks:
+            humans_batch = self._inference_sparse(imgs, upsample_size)
+        else:
+            humans_batch = self._inference_full(imgs, upsample_size)
+
+        if resize_to_default and self.letterbox:
+            # coordinates relative to the padded input -> relative to the image
+            for i, npimg in enumerate(npimgs):
+                x, y, box_w, box_h = self.image_buffer.get_box(npimg.shape[1], npimg.shape[0], img_w, img_h)
+                humans_batch[i] = HumanBatch.from_humans(humans_batch[i]).transform(
+                    -x / float(box_w), -y / float(box_h), img_w / float(box_w), img_h / float(box_h))
+        return humans_batch
+
+    def _inference_full(self, imgs, upsample_size):
         peaks, heatMat_up, pafMat_up = self.persistent_sess.run(
             [self.tensor_peaks, self.tensor_heatMat_up, self.tensor_pafMat_up], feed_dict={
-                self.tensor_image: [img], self.upsample_size: upsample_size
+                self.tensor_image: imgs, self.upsample_size: upsample_size
             })
-        peaks = peaks[0]
-        self.heatMat = heatMat_up[0]
-        self.pafMat = pafMat_up[0]
-        logger.debug('inference- heatMat=%dx%d pafMat=%dx%d' % (
-            self.heatMat.shape[1], self.heatMat.shape[0], self.pafMat.shape[1], self.pafMat.shape[0]))
+        self.heatMat = heatMat_up[-1]
+        self.pafMat = pafMat_up[-1]
+        logger.debug('inference- batch=%d heatMat=%dx%d pafMat=%dx%d' % (
+            len(imgs), self.heatMat.shape[1], self.heatMat.shape[0], self.pafMat.shape[1], self.pafMat.shape[0]))
+
+        t = time.time()
+        humans_batch = self._map_paf(PoseEstimator.estimate_paf, [
+            (peaks[i], heatMat_up[i], pafMat_up[i], self.max_limb_length, self.paf_threads)
+            for i in range(len(imgs))])
+        logger.debug('estimate time=%.5f' % (time.time() - t))
+        return humans_batch
+
+    def _inference_sparse(self, imgs, upsample_size):
+        # only the network runs in the graph, the maps are upsampled around the peaks by find_peaks
+        output = self.persistent_sess.run(self.tensor_output, feed_dict={self.tensor_image: imgs})
+        self.heatMat = output[-1, :, :, :19]
+        self.pafMat = output[-1, :, :, 19:]
+
+        t = time.time()
+        args = [(find_peaks(output[i, :, :, :19], upsample_size, self.peak_kernel), output[i, :, :, 19:],
+                 upsample_size, self.max_limb_length, self.paf_threads) for i in range(len(imgs))]
+        logger.debug('inference- batch=%d peaks=%d time=%.5f' % (
+            len(imgs), sum(len(arg[0]) for arg in args), time.time() - t))
 
         t = time.time()
-        humans = PoseEstimator.estimate_paf(peaks, self.heatMat, self.pafMat)
+        humans_batch = self._map_paf(PoseEstimator.estimate_paf_sparse, args)
         logger.debug('estimate time=%.5f' % (time.time() - t))
-        return humans
+        return humans_batch
+
+    def _inference_lean(self, imgs, upsample_size):
+        coords, scores, output = self.persistent_sess.run(
+            [self.tensor_peak_coords, self.tensor_peak_scores, self.tensor_output], feed_dict={
+                self.tensor_image: imgs, self.upsample_size: upsample_size
+            })
+        self.heatMat = output[-1, :, :, :19]
+        self.pafMat = output[-1, :, :, 19:]
+        logger.debug('inference- batch=%d peaks=%d' % (len(imgs), len(coords)))
+
+        t = time.time()
+        bounds = np.searchsorted(coords[:, 0], np.arange(len(imgs) + 1))
+        args = []
+        for i in range(len(imgs)):
+            image_coords = coords[bounds[i]:bounds[i + 1]]
+            peaks = np.column_stack([image_coords[:, 3], image_coords[:, 1], image_coords[:, 2],
+                                     scores[bounds[i]:bounds[i + 1]]]).astype(np.float32)
+            args.append((peaks, output[i, :, :, 19:], upsample_size, self.max_limb_length, self.paf_threads))
+        humans_batch = self._map_paf(PoseEstimator.estimate_paf_sparse, args)
+        logger.debug('estimate time=%.5f' % (time.time() - t))
+        return humans_batch
+
+    def _map_paf(self, estimate, args):
+        # pafprocess releases the GIL, so the images of a batch are assembled in parallel
+        if self.paf_pool is None or len(args) < 2:
+            return [estimate(*arg) for arg in args]
+        return list(self.paf_pool.map(lambda arg: estimate(*arg), args))
 
 
 if __name__ == '__main__':
+    import argparse
     import pickle
 
-    f = open('./etcs/heatpaf1.pkl', 'rb')
+    parser = argparse.ArgumentParser(description='benchmark pafprocess on recorded heatmaps')
+    parser.add_argument('--data', type=str, default='./etcs/heatpaf1.pkl',
+                        help='pickle with peaks, heatMat and pafMat of one image')
+    parser.add_argument('--repeats', type=int, default=100)
+    parser.add_argument('--max-limb-length', type=float, default=0.5)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    f = open(args.data, 'rb')
     data = pickle.load(f)
     logger.info('size={}'.format(data['heatMat'].shape))
     f.close()
 
-    t = time.time()
-    humans = PoseEstimator.estimate_paf(data['peaks'], data['heatMat'], data['pafMat'])
-    dt = time.time() - t;
-    t = time.time()
-    logger.info('elapsed #humans=%d time=%.8f' % (len(humans), dt))
+    for max_limb_length, n_threads in ((0.0, 1), (args.max_limb_length, 1), (0.0, args.threads)):
+        t = time.time()
+        for _ in range(args.repeats):
+            humans = PoseEstimator.estimate_paf(data['peaks'], data['heatMat'], data['pafMat'], max_limb_length,
+                                                n_threads)
+        dt = (time.time() - t) / args.repeats
+        logger.info('max_limb_length=%.2f threads=%d elapsed #humans=%d time=%.8f' % (
+            max_limb_length, n_threads, len(humans), dt))
@@ -10,7 +10,7 @@ import json, re
 from tqdm import tqdm
 
 from tf_pose.common import read_imgfile
-from tf_pose.estimator import TfPoseEstimator
+from tf_pose.estimator import TfPoseEstimator, HumanBatch
 from tf_pose.networks import model_wh, get_graph_path
 
 from pycocotools.coco import COCO
@@ -33,10 +33,12 @@ def round_int(val):
     return int(round(val))
 
 
+COCO_IDS = [0, 15, 14, 17, 16, 5, 2, 6, 3, 7, 4, 11, 8, 12, 9, 13, 10]
+
+
 def write_coco_json(human, image_w, image_h):
     keypoints = []
-    coco_ids = [0, 15, 14, 17, 16, 5, 2, 6, 3, 7, 4, 11, 8, 12, 9, 13, 10]
-    for coco_id in coco_ids:
+    for coco_id in COCO_IDS:
         if coco_id not in human.body_parts.keys():
             keypoints.extend([0, 0, 0])
             continue
@@ -45,6 +47,22 @@ def write_coco_json(human, image_w, image_h):
     return keypoints
 
 
+def write_coco_json_batch(humans, image_w, image_h):
+    """
+    write_coco_json for all humans of an image at once
+    :param humans: HumanBatch or list of Human
+    :return: list of coco keypoint lists, one per human
+    """
+    humans = HumanBatch.from_humans(humans)
+    valid = humans.valid[:, COCO_IDS]
+    coords = np.round(humans.coords[:, COCO_IDS].astype(np.float64) * (image_w, image_h))
+
+    keypoints = np.zeros(valid.shape + (3,), dtype=np.int64)
+    keypoints[..., :2] = np.where(valid[..., None], coords, 0)
+    keypoints[..., 2] = valid * 2
+    return keypoints.reshape(len(humans), len(COCO_IDS) * 3).tolist()
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Tensorflow Openpose Inference')
     parser.add_argument('--resize', type=str, default='0x0', help='if provided, resize images before they are processed. default=0x0, Recommends : 432x368 or 656x368 or 1312x736 ')
@@ -106,12 +124,14 @@ if __name__ == '__main__':
         scores = 0
         ann_idx = cocoGt.getAnnIds(imgIds=[img_idx], catIds=[1])
         anns = cocoGt.loadAnns(ann_idx)
-        for human in humans:
+        humans = HumanBatch.from_humans(humans)
+        keypoints = write_coco_json_batch(humans, img_meta['width'], img_meta['height'])
+        for human_keypoints, human_score in zip(keypoints, humans.scores.tolist()):
             item = {
                 'image_id': img_idx,
                 'category_id': 1,
-                'keypoints': write_coco_json(human, img_meta['width'], img_meta['height']),
-                'score': human.score
+                'keypoints': human_keypoints,
+                'score': human_score
             }
             result.append(item)
             scores += item['score']
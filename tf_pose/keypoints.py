@@ -0,0 +1,219 @@
+import csv
+import os
+import shutil
+
+import numpy as np
+
+from tf_pose.common import CocoPart
+from tf_pose.estimator import HumanBatch
+
+NUM_PARTS = CocoPart.Background.value
+
+
+def get_index_path(path):
+    return os.path.splitext(path)[0] + '.index.npy'
+
+
+class KeypointWriter:
+    """
+    Streaming writer of keypoints in a columnar layout.
+
+    keypoints : float32 array of frames x max_humans x 18 x (x, y, score), NaN for missing parts/humans
+    index : int64 array of frames x (frame number, number of humans, carried over from the previous frame)
+
+    '.npy' paths are written through a memory-mapped file, the index goes next to it ('<name>.index.npy').
+    '.npz' paths are kept in memory and saved with both arrays on close.
+    """
+
+    def __init__(self, path, capacity=1024, max_humans=20):
+        self.path = path
+        self.max_humans = max_humans
+        self.is_mmap = not path.endswith('.npz')
+        self.count = 0
+        self.dropped_humans = 0
+
+        self._keypoints = self._allocate(self.path, max(capacity, 1))
+        self._index = np.zeros((len(self._keypoints), 3), dtype=np.int64)
+
+    def _allocate(self, path, capacity):
+        shape = (capacity, self.max_humans, NUM_PARTS, 3)
+        if self.is_mmap:
+            return np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+        return np.empty(shape, dtype=np.float32)
+
+    def _grow(self):
+        capacity = len(self._keypoints) * 2
+        index = np.zeros((capacity, 3), dtype=np.int64)
+        index[:self.count] = self._index[:self.count]
+        self._index = index
+
+        if not self.is_mmap:
+            keypoints = np.empty((capacity,) + self._keypoints.shape[1:], dtype=np.float32)
+            keypoints[:self.count] = self._keypoints[:self.count]
+            self._keypoints = keypoints
+            return
+
+        tmp_path = self.path + '.tmp'
+        keypoints = self._allocate(tmp_path, capacity)
+        keypoints[:self.count] = self._keypoints[:self.count]
+        keypoints.flush()
+        del self._keypoints
+        del keypoints
+        os.replace(tmp_path, self.path)
+        self._keypoints = np.load(self.path, mmap_mode='r+')
+
+    def write(self, frame_idx, humans, carried=False):
+        """
+        :param frame_idx:
+        :param humans: HumanBatch or list of Human, the best max_humans by score are kept
+        :param carried:
+        """
+        if self.count == len(self._keypoints):
+            self._grow()
+
+        batch = HumanBatch.from_humans(humans)
+        coords, part_scores, valid = batch.coords, batch.part_scores, batch.valid
+        if len(batch) > self.max_humans:
+            self.dropped_humans += len(batch) - self.max_humans
+            order = np.argsort(-batch.scores, kind='stable')[:self.max_humans]
+            coords, part_scores, valid = coords[order], part_scores[order], valid[order]
+
+        n = len(valid)
+        row = self._keypoints[self.count]
+        row[:n] = np.where(valid[..., None], np.dstack([coords, part_scores]), np.nan)
+        row[n:] = np.nan
+
+        self._index[self.count] = (frame_idx, n, carried)
+        self.count += 1
+
+    def close(self):
+        if self.is_mmap:
+            self._keypoints.flush()
+            np.save(get_index_path(self.path), self._index[:self.count])
+        else:
+            np.savez(self.path, keypoints=self._keypoints[:self.count], index=self._index[:self.count])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CsvKeypointWriter:
+    """
+    Writer of keypoints as a typed table with one row per detected body part:
+    frame, human_id, part_idx, x, y, score, carried
+
+    carried is 1 when the humans were reused from the previous frame instead of being inferred.
+
+    Coordinates are normalized to [0, 1] unless image_size=(w, h) is given, then they are in pixels.
+    Rows are buffered and written in chunks of flush_rows.
+    """
+    HEADER = ('frame', 'human_id', 'part_idx', 'x', 'y', 'score', 'carried')
+
+    def __init__(self, path, image_size=None, flush_rows=8192):
+        self.path = path
+        self.scale_x, self.scale_y = image_size if image_size else (1.0, 1.0)
+        self.flush_rows = flush_rows
+
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.HEADER)
+        self._rows = []
+
+    def write(self, frame_idx, humans, carried=False):
+        """
+        :param frame_idx:
+        :param humans: HumanBatch or list of Human
+        :param carried:
+        """
+        batch = HumanBatch.from_humans(humans)
+        human_ids, part_ids = np.nonzero(batch.valid)
+        values = batch.keypoints[human_ids, part_ids].astype(np.float64) * (self.scale_x, self.scale_y, 1.0)
+        n = len(human_ids)
+        self._rows.extend(zip([frame_idx] * n, human_ids.tolist(), part_ids.tolist(),
+                              *np.round(values, 4).T.tolist(), [int(carried)] * n))
+        if len(self._rows) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        self._writer.writerows(self._rows)
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def open_keypoint_writer(path, capacity=1024, image_size=None):
+    """
+    Open a keypoint writer matching the file extension: '.npy' / '.npz' for KeypointWriter, CSV otherwise.
+    :param path:
+    :param capacity: expected number of frames, used to preallocate the binary store
+    :param image_size: (w, h) to write pixel instead of normalized coordinates to CSV
+    :return:
+    """
+    if path.endswith(('.npy', '.npz')):
+        return KeypointWriter(path, capacity=capacity)
+    return CsvKeypointWriter(path, image_size=image_size)
+
+
+def load_keypoints(path):
+    """
+    Read keypoints written by KeypointWriter.
+    For '.npy' files the keypoints are a read-only memory map, nothing is copied until it is accessed.
+    :param path:
+    :return: keypoints (frames x max_humans x 18 x 3), index (frames x (frame number, number of humans, carried))
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return data['keypoints'], data['index']
+
+    index = np.load(get_index_path(path))
+    keypoints = np.load(path, mmap_mode='r')[:len(index)]
+    return keypoints, index
+
+
+def merge_keypoint_files(paths, output_path):
+    """
+    Concatenate keypoint files of the same format, e.g. written for consecutive parts of a video, in the given order
+    :param paths:
+    :param output_path:
+    :return:
+    """
+    if not output_path.endswith(('.npy', '.npz')):
+        with open(output_path, 'w', newline='') as output:
+            for i, path in enumerate(paths):
+                with open(path, newline='') as f:
+                    header = f.readline()
+                    if i == 0:
+                        output.write(header)
+                    shutil.copyfileobj(f, output)
+        return
+
+    parts = [load_keypoints(path) for path in paths]
+    frames_total = sum(len(index) for _, index in parts)
+    shape = (frames_total,) + parts[0][0].shape[1:]
+    if output_path.endswith('.npz'):
+        keypoints = np.empty(shape, dtype=np.float32)
+    else:
+        keypoints = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float32, shape=shape)
+
+    offset = 0
+    for part_keypoints, part_index in parts:
+        keypoints[offset:offset + len(part_index)] = part_keypoints
+        offset += len(part_index)
+    index = np.concatenate([part_index for _, part_index in parts])
+
+    if output_path.endswith('.npz'):
+        np.savez(output_path, keypoints=keypoints, index=index)
+    else:
+        keypoints.flush()
+        np.save(get_index_path(output_path), index)
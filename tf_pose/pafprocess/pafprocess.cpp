@@ -1,5 +1,8 @@
 #include <iostream>
 #include <algorithm>
+#include <atomic>
+#include <thread>
+#include <stdlib.h>
 #include <math.h>
 #include "pafprocess.h"
 
@@ -9,14 +12,19 @@
 
 using namespace std;
 
-vector<vector<float> > subset;
-vector<Peak> peak_infos_line;
-
 int roundpaf(float v);
-vector<VectorXY> get_paf_vectors(float *pafmap, const int& ch_id1, const int& ch_id2, int& f2, int& f3, Peak& peak1, Peak& peak2);
+float score_pair(const PafSampler& paf, int ch_id1, int ch_id2, const Peak& peak1, const Peak& peak2, VectorXY vec, int *criterion1);
 bool comp_candidate(ConnectionCandidate a, ConnectionCandidate b);
-
-int process_paf(int p1, int p2, int p3, float *peaks, int h1, int h2, int h3, float *heatmap, int f1, int f2, int f3, float *pafmap) {
+void connect_limb(int pair_id, vector<Peak> *peak_infos, const PafSampler& paf, int h1, float max_norm2, vector<Connection>& conns);
+void connect_peaks(vector<Peak> *peak_infos, const PafSampler& paf, int h1, float max_limb_length, int n_threads, PafResult& result);
+const vector<int>& index_rows(const RowIndex& index, int peak_id);
+void set_part(vector<vector<float> >& subset, RowIndex *index, int subset_id, int part_id, float peak_id);
+void export_result(const PafResult& result, int heat_h, int heat_w,
+                   float **keypoints, int *n_humans, int *n_parts, int *n_values, float **scores, int *n_scores);
+
+void process_paf(int p1, int p2, int p3, float *peaks, int h1, int h2, int h3, float *heatmap, int f1, int f2, int f3, float *pafmap,
+                 float max_limb_length, int n_threads,
+                 float **keypoints, int *n_humans, int *n_parts, int *n_values, float **scores, int *n_scores) {
 //    const int THRE_CNT = 4;
 //    const double THRESH_PAF = 0.40;
     vector<Peak> peak_infos[NUM_PART];
@@ -36,96 +44,180 @@ int process_paf(int p1, int p2, int p3, float *peaks, int h1, int h2, int h3, fl
         }
     }
 
-    peak_infos_line.clear();
+    PafSampler paf = {pafmap, f1, f2, f3, 1.0f, 1.0f, false};
+    PafResult result;
+    connect_peaks(peak_infos, paf, h1, max_limb_length, n_threads, result);
+    export_result(result, h1, h2, keypoints, n_humans, n_parts, n_values, scores, n_scores);
+}
+
+/*
+ * peaks : n1 x 4 rows of (part id, y, x, heat score) in heatmap pixels, ordered by y, x within a part
+ * pafmap : part affinity fields at any resolution, sampled with bilinear interpolation
+ * heat_h, heat_w : size of the heatmap the peaks were found in
+ */
+void process_paf_sparse(int n1, int n2, float *peaks, int f1, int f2, int f3, float *pafmap, int heat_h, int heat_w,
+                        float max_limb_length, int n_threads,
+                        float **keypoints, int *n_humans, int *n_parts, int *n_values, float **scores, int *n_scores) {
+    vector<Peak> peak_infos[NUM_PART];
+    for (int i = 0; i < n1; i ++) {
+        int part_id = (int) peaks[i * n2];
+        if (part_id < 0 || part_id >= NUM_PART) continue;
+
+        Peak info;
+        info.y = (int) peaks[i * n2 + 1];
+        info.x = (int) peaks[i * n2 + 2];
+        info.score = peaks[i * n2 + 3];
+        peak_infos[part_id].push_back(info);
+    }
+
+    // ids are numbered part by part, as in process_paf
+    int peak_cnt = 0;
     for (int part_id = 0; part_id < NUM_PART; part_id ++) {
         for (int i = 0; i < (int) peak_infos[part_id].size(); i ++) {
-            peak_infos_line.push_back(peak_infos[part_id][i]);
+            peak_infos[part_id][i].id = peak_cnt++;
         }
     }
 
-    // Start to Connect
-    vector<Connection> connection_all[COCOPAIRS_SIZE];
-    for (int pair_id = 0; pair_id < COCOPAIRS_SIZE; pair_id ++) {
-        vector<ConnectionCandidate> candidates;
-        vector<Peak>& peak_a_list = peak_infos[COCOPAIRS[pair_id][0]];
-        vector<Peak>& peak_b_list = peak_infos[COCOPAIRS[pair_id][1]];
+    PafSampler paf = {pafmap, f1, f2, f3, f1 / (float) heat_h, f2 / (float) heat_w, true};
+    PafResult result;
+    connect_peaks(peak_infos, paf, heat_h, max_limb_length, n_threads, result);
+    export_result(result, heat_h, heat_w, keypoints, n_humans, n_parts, n_values, scores, n_scores);
+}
 
-        if (peak_a_list.size() == 0 || peak_b_list.size() == 0) {
-            continue;
+void export_result(const PafResult& result, int heat_h, int heat_w,
+                   float **keypoints, int *n_humans, int *n_parts, int *n_values, float **scores, int *n_scores) {
+    *n_humans = *n_scores = result.subset.size();
+    *n_parts = NUM_PART;
+    *n_values = 3;
+    *keypoints = (float *) malloc(sizeof(float) * max(*n_humans * NUM_PART * 3, 1));
+    *scores = (float *) malloc(sizeof(float) * max(*n_humans, 1));
+
+    for (int human_id = 0; human_id < *n_humans; human_id ++) {
+        const vector<float>& row = result.subset[human_id];
+        for (int part_id = 0; part_id < NUM_PART; part_id ++) {
+            float *keypoint = *keypoints + (human_id * NUM_PART + part_id) * 3;
+            int cid = (int) row[part_id];
+            if (cid < 0) {
+                keypoint[0] = keypoint[1] = keypoint[2] = NAN;
+                continue;
+            }
+            const Peak& peak = result.peak_infos_line[cid];
+            keypoint[0] = (float) ((double) peak.x / heat_w);
+            keypoint[1] = (float) ((double) peak.y / heat_h);
+            keypoint[2] = peak.score;
         }
+        (*scores)[human_id] = row[18] / row[19];
+    }
+}
 
-        for (int peak_a_id = 0; peak_a_id < (int) peak_a_list.size(); peak_a_id ++) {
-            Peak& peak_a = peak_a_list[peak_a_id];
-            for (int peak_b_id = 0; peak_b_id < (int) peak_b_list.size(); peak_b_id ++) {
-                Peak& peak_b = peak_b_list[peak_b_id];
-
-                // calculate vector(direction)
-                VectorXY vec;
-                vec.x = peak_b.x - peak_a.x;
-                vec.y = peak_b.y - peak_a.y;
-                float norm = (float) sqrt(vec.x * vec.x + vec.y * vec.y);
-                if (norm < 1e-12) continue;
-                vec.x = vec.x / norm;
-                vec.y = vec.y / norm;
-
-                vector<VectorXY> paf_vecs = get_paf_vectors(pafmap, COCOPAIRS_NET[pair_id][0], COCOPAIRS_NET[pair_id][1], f2, f3, peak_a, peak_b);
-                float scores = 0.0f;
-
-                // criterion 1 : score treshold count
-                int criterion1 = 0;
-                for (int i = 0; i < STEP_PAF; i ++) {
-                    float score = vec.x * paf_vecs[i].x + vec.y * paf_vecs[i].y;
-                    scores += score;
-
-                    if (score > THRESH_VECTOR_SCORE) criterion1 += 1;
-                }
+void connect_limb(int pair_id, vector<Peak> *peak_infos, const PafSampler& paf, int h1, float max_norm2, vector<Connection>& conns) {
+    vector<ConnectionCandidate> candidates;
+    vector<Peak>& peak_a_list = peak_infos[COCOPAIRS[pair_id][0]];
+    vector<Peak>& peak_b_list = peak_infos[COCOPAIRS[pair_id][1]];
 
-                float criterion2 = scores / STEP_PAF + min(0.0, 0.5 * h1 / norm - 1.0);
+    if (peak_a_list.size() == 0 || peak_b_list.size() == 0) {
+        return;
+    }
 
-                if (criterion1 > THRESH_VECTOR_CNT1 && criterion2 > 0) {
-                    ConnectionCandidate candidate;
-                    candidate.idx1 = peak_a_id;
-                    candidate.idx2 = peak_b_id;
-                    candidate.score = criterion2;
-                    candidate.etc = criterion2 + peak_a.score + peak_b.score;
-                    candidates.push_back(candidate);
-                }
+    for (int peak_a_id = 0; peak_a_id < (int) peak_a_list.size(); peak_a_id ++) {
+        Peak& peak_a = peak_a_list[peak_a_id];
+        for (int peak_b_id = 0; peak_b_id < (int) peak_b_list.size(); peak_b_id ++) {
+            Peak& peak_b = peak_b_list[peak_b_id];
+
+            // calculate vector(direction)
+            VectorXY vec;
+            vec.x = peak_b.x - peak_a.x;
+            vec.y = peak_b.y - peak_a.y;
+            float norm2 = vec.x * vec.x + vec.y * vec.y;
+            if (max_norm2 > 0 && norm2 > max_norm2) continue;
+            float norm = (float) sqrt(norm2);
+            if (norm < 1e-12) continue;
+            vec.x = vec.x / norm;
+            vec.y = vec.y / norm;
+
+            // criterion 1 : score treshold count
+            int criterion1;
+            float scores = score_pair(paf, COCOPAIRS_NET[pair_id][0], COCOPAIRS_NET[pair_id][1], peak_a, peak_b, vec, &criterion1);
+            if (criterion1 <= THRESH_VECTOR_CNT1) continue;
+
+            float criterion2 = scores / STEP_PAF + min(0.0, 0.5 * h1 / norm - 1.0);
+
+            if (criterion1 > THRESH_VECTOR_CNT1 && criterion2 > 0) {
+                ConnectionCandidate candidate;
+                candidate.idx1 = peak_a_id;
+                candidate.idx2 = peak_b_id;
+                candidate.score = criterion2;
+                candidate.etc = criterion2 + peak_a.score + peak_b.score;
+                candidates.push_back(candidate);
             }
         }
+    }
 
-        vector<Connection>& conns = connection_all[pair_id];
-        sort(candidates.begin(), candidates.end(), comp_candidate);
-        for (int c_id = 0; c_id < (int) candidates.size(); c_id ++) {
-            ConnectionCandidate& candidate = candidates[c_id];
-            bool assigned = false;
-            for (int conn_id = 0; conn_id < (int) conns.size(); conn_id ++) {
-                if (conns[conn_id].peak_id1 == candidate.idx1) {
-                    // already assigned
-                    assigned = true;
-                    break;
-                }
-                if (assigned) break;
-                if (conns[conn_id].peak_id2 == candidate.idx2) {
-                    // already assigned
-                    assigned = true;
-                    break;
-                }
-                if (assigned) break;
+    sort(candidates.begin(), candidates.end(), comp_candidate);
+    for (int c_id = 0; c_id < (int) candidates.size(); c_id ++) {
+        ConnectionCandidate& candidate = candidates[c_id];
+        bool assigned = false;
+        for (int conn_id = 0; conn_id < (int) conns.size(); conn_id ++) {
+            if (conns[conn_id].peak_id1 == candidate.idx1) {
+                // already assigned
+                assigned = true;
+                break;
             }
-            if (assigned) continue;
-
-            Connection conn;
-            conn.peak_id1 = candidate.idx1;
-            conn.peak_id2 = candidate.idx2;
-            conn.score = candidate.score;
-            conn.cid1 = peak_a_list[candidate.idx1].id;
-            conn.cid2 = peak_b_list[candidate.idx2].id;
-            conns.push_back(conn);
+            if (assigned) break;
+            if (conns[conn_id].peak_id2 == candidate.idx2) {
+                // already assigned
+                assigned = true;
+                break;
+            }
+            if (assigned) break;
+        }
+        if (assigned) continue;
+
+        Connection conn;
+        conn.peak_id1 = candidate.idx1;
+        conn.peak_id2 = candidate.idx2;
+        conn.score = candidate.score;
+        conn.cid1 = peak_a_list[candidate.idx1].id;
+        conn.cid2 = peak_b_list[candidate.idx2].id;
+        conns.push_back(conn);
+    }
+}
+
+void connect_peaks(vector<Peak> *peak_infos, const PafSampler& paf, int h1, float max_limb_length, int n_threads, PafResult& result) {
+    vector<vector<float> >& subset = result.subset;
+    vector<Peak>& peak_infos_line = result.peak_infos_line;
+    for (int part_id = 0; part_id < NUM_PART; part_id ++) {
+        for (int i = 0; i < (int) peak_infos[part_id].size(); i ++) {
+            peak_infos_line.push_back(peak_infos[part_id][i]);
+        }
+    }
+
+    // Start to Connect
+    const float max_norm2 = max_limb_length > 0 ? (max_limb_length * h1) * (max_limb_length * h1) : -1.0f;
+    vector<Connection> connection_all[COCOPAIRS_SIZE];
+    if (n_threads <= 1) {
+        for (int pair_id = 0; pair_id < COCOPAIRS_SIZE; pair_id ++) {
+            connect_limb(pair_id, peak_infos, paf, h1, max_norm2, connection_all[pair_id]);
         }
+    } else {
+        // limbs are scored independently, threads take the next one until all are done
+        atomic<int> next_pair(0);
+        vector<thread> workers;
+        for (int i = 0; i < min(n_threads, COCOPAIRS_SIZE); i ++) {
+            workers.push_back(thread([&]() {
+                for (int pair_id = next_pair ++; pair_id < COCOPAIRS_SIZE; pair_id = next_pair ++) {
+                    connect_limb(pair_id, peak_infos, paf, h1, max_norm2, connection_all[pair_id]);
+                }
+            }));
+        }
+        for (int i = 0; i < (int) workers.size(); i ++) workers[i].join();
     }
 
     // Generate subset
-    subset.clear();
+    // rows are looked up by the peak ids they hold instead of scanning the subset for every connection,
+    // merged rows are only marked dead and dropped at the end, so row order stays as with erase
+    RowIndex index[NUM_PART];
+    vector<bool> alive;
     for (int pair_id = 0; pair_id < COCOPAIRS_SIZE; pair_id ++) {
         vector<Connection>& conns = connection_all[pair_id];
         int part_id1 = COCOPAIRS[pair_id][0];
@@ -134,22 +226,28 @@ int process_paf(int p1, int p2, int p3, float *peaks, int h1, int h2, int h3, fl
         for (int conn_id = 0; conn_id < (int) conns.size(); conn_id ++) {
             int found = 0;
             int subset_idx1=0, subset_idx2=0;
-            for (int subset_id = 0; subset_id < (int) subset.size(); subset_id ++) {
-                if (subset[subset_id][part_id1] == conns[conn_id].cid1 || subset[subset_id][part_id2] == conns[conn_id].cid2) {
-                    if (found == 0) subset_idx1 = subset_id;
-                    if (found == 1) subset_idx2 = subset_id;
-                    found += 1;
+            const vector<int>& rows1 = index_rows(index[part_id1], conns[conn_id].cid1);
+            const vector<int>& rows2 = index_rows(index[part_id2], conns[conn_id].cid2);
+            for (int i = 0, j = 0; found < 3 && (i < (int) rows1.size() || j < (int) rows2.size()); found ++) {
+                int subset_id;
+                if (j == (int) rows2.size() || (i < (int) rows1.size() && rows1[i] <= rows2[j])) {
+                    subset_id = rows1[i ++];
+                    if (j < (int) rows2.size() && rows2[j] == subset_id) j ++;
+                } else {
+                    subset_id = rows2[j ++];
                 }
+                if (found == 0) subset_idx1 = subset_id;
+                if (found == 1) subset_idx2 = subset_id;
             }
 
             if (found == 1) {
                 if (subset[subset_idx1][part_id2] != conns[conn_id].cid2) {
-                    subset[subset_idx1][part_id2] = conns[conn_id].cid2;
+                    set_part(subset, index, subset_idx1, part_id2, conns[conn_id].cid2);
                     subset[subset_idx1][19] += 1;
                     subset[subset_idx1][18] += peak_infos_line[conns[conn_id].cid2].score + conns[conn_id].score;
                 }
             } else if (found == 2) {
-                int membership;
+                int membership = 0;
                 for (int subset_id = 0; subset_id < 18; subset_id ++) {
                     if (subset[subset_idx1][subset_id] > 0 && subset[subset_idx2][subset_id] > 0) {
                         membership = 2;
@@ -157,79 +255,112 @@ int process_paf(int p1, int p2, int p3, float *peaks, int h1, int h2, int h3, fl
                 }
 
                 if (membership == 0) {
-                    for (int subset_id = 0; subset_id < 18; subset_id ++) subset[subset_idx1][subset_id] += (subset[subset_idx2][subset_id] + 1);
+                    for (int subset_id = 0; subset_id < 18; subset_id ++) {
+                        set_part(subset, index, subset_idx1, subset_id,
+                                 subset[subset_idx1][subset_id] + (subset[subset_idx2][subset_id] + 1));
+                        set_part(subset, index, subset_idx2, subset_id, -1);
+                    }
 
                     subset[subset_idx1][19] += subset[subset_idx2][19];
                     subset[subset_idx1][18] += subset[subset_idx2][18];
                     subset[subset_idx1][18] += conns[conn_id].score;
-                    subset.erase(subset.begin() + subset_idx2);
+                    alive[subset_idx2] = false;
                 } else {
-                    subset[subset_idx1][part_id2] = conns[conn_id].cid2;
+                    set_part(subset, index, subset_idx1, part_id2, conns[conn_id].cid2);
                     subset[subset_idx1][19] += 1;
                     subset[subset_idx1][18] += peak_infos_line[conns[conn_id].cid2].score + conns[conn_id].score;
                 }
             } else if (found == 0 && pair_id < 17) {
                 vector<float> row(20);
                 for (int i = 0; i < 20; i ++) row[i] = -1;
-                row[part_id1] = conns[conn_id].cid1;
-                row[part_id2] = conns[conn_id].cid2;
                 row[19] = 2;
                 row[18] = peak_infos_line[conns[conn_id].cid1].score +
                           peak_infos_line[conns[conn_id].cid2].score +
                           conns[conn_id].score;
                 subset.push_back(row);
+                alive.push_back(true);
+                set_part(subset, index, subset.size() - 1, part_id1, conns[conn_id].cid1);
+                set_part(subset, index, subset.size() - 1, part_id2, conns[conn_id].cid2);
             }
         }
     }
 
-    // delete some rows
-    for (int i = subset.size() - 1; i >= 0; i --) {
-        if (subset[i][19] < THRESH_PART_CNT || subset[i][18] / subset[i][19] < THRESH_HUMAN_SCORE)
-            subset.erase(subset.begin() + i);
+    // delete merged rows and some more
+    int kept = 0;
+    for (int i = 0; i < (int) subset.size(); i ++) {
+        if (!alive[i] || subset[i][19] < THRESH_PART_CNT || subset[i][18] / subset[i][19] < THRESH_HUMAN_SCORE)
+            continue;
+        if (kept != i) subset[kept].swap(subset[i]);
+        kept ++;
     }
-
-    return 0;
-}
-
-int get_num_humans() {
-    return subset.size();
+    subset.resize(kept);
 }
 
-int get_part_cid(int human_id, int part_id) {
-    return subset[human_id][part_id];
+const vector<int>& index_rows(const RowIndex& index, int peak_id) {
+    static const vector<int> none;
+    return peak_id >= 0 && peak_id < (int) index.size() ? index[peak_id] : none;
 }
 
-float get_score(int human_id) {
-    return subset[human_id][18] / subset[human_id][19];
-}
-
-int get_part_x(int cid) {
-    return peak_infos_line[cid].x;
-}
-int get_part_y(int cid) {
-    return peak_infos_line[cid].y;
-}
-float get_part_score(int cid) {
-    return peak_infos_line[cid].score;
+void set_part(vector<vector<float> >& subset, RowIndex *index, int subset_id, int part_id, float peak_id) {
+    // indices stay sorted by row, the first rows holding a peak are the ones the connection joins
+    float old_id = subset[subset_id][part_id];
+    if (old_id >= 0) {
+        vector<int>& rows = index[part_id][(int) old_id];
+        rows.erase(lower_bound(rows.begin(), rows.end(), subset_id));
+    }
+    subset[subset_id][part_id] = peak_id;
+    if (peak_id >= 0) {
+        if ((int) peak_id >= (int) index[part_id].size()) index[part_id].resize((int) peak_id + 1);
+        vector<int>& rows = index[part_id][(int) peak_id];
+        rows.insert(upper_bound(rows.begin(), rows.end(), subset_id), subset_id);
+    }
 }
 
-vector<VectorXY> get_paf_vectors(float *pafmap, const int& ch_id1, const int& ch_id2, int& f2, int& f3, Peak& peak1, Peak& peak2) {
-    vector<VectorXY> paf_vectors;
-
+/*
+ * Sum of the paf along the pair projected on its direction, sampled one point at a time without buffering.
+ * Sampling stops once more than MAX_VECTOR_MISS samples are below THRESH_VECTOR_SCORE, the pair is rejected anyway.
+ */
+float score_pair(const PafSampler& paf, int ch_id1, int ch_id2, const Peak& peak1, const Peak& peak2, VectorXY vec, int *criterion1) {
     const float STEP_X = (peak2.x - peak1.x) / float(STEP_PAF);
     const float STEP_Y = (peak2.y - peak1.y) / float(STEP_PAF);
 
+    float scores = 0.0f;
+    int missed = 0;
+    *criterion1 = 0;
     for (int i = 0; i < STEP_PAF; i ++) {
-        int location_x = roundpaf(peak1.x + i * STEP_X);
-        int location_y = roundpaf(peak1.y + i * STEP_Y);
+        VectorXY paf_vec = paf.sample(ch_id1, ch_id2, peak1.x + i * STEP_X, peak1.y + i * STEP_Y);
+        float score = vec.x * paf_vec.x + vec.y * paf_vec.y;
+        scores += score;
+
+        if (score > THRESH_VECTOR_SCORE) *criterion1 += 1;
+        else if (++ missed > MAX_VECTOR_MISS) break;
+    }
+    return scores;
+}
 
-        VectorXY v;
+VectorXY PafSampler::sample(int ch_id1, int ch_id2, float x, float y) const {
+    const int f1 = this->f1, f2 = this->f2, f3 = this->f3;
+    VectorXY v;
+    if (!interpolate) {
+        int location_x = roundpaf(x);
+        int location_y = roundpaf(y);
         v.x = PAF(location_y, location_x, ch_id1);
         v.y = PAF(location_y, location_x, ch_id2);
-        paf_vectors.push_back(v);
+        return v;
     }
 
-    return paf_vectors;
+    // pixel centers of the heatmap mapped onto the pafmap
+    float fy = min(max((y + 0.5f) * scale_y - 0.5f, 0.0f), (float) (f1 - 1));
+    float fx = min(max((x + 0.5f) * scale_x - 0.5f, 0.0f), (float) (f2 - 1));
+    int y0 = (int) fy, x0 = (int) fx;
+    int y1 = min(y0 + 1, f1 - 1), x1 = min(x0 + 1, f2 - 1);
+    float wy = fy - y0, wx = fx - x0;
+
+    v.x = (1 - wy) * ((1 - wx) * PAF(y0, x0, ch_id1) + wx * PAF(y0, x1, ch_id1)) +
+          wy * ((1 - wx) * PAF(y1, x0, ch_id1) + wx * PAF(y1, x1, ch_id1));
+    v.y = (1 - wy) * ((1 - wx) * PAF(y0, x0, ch_id2) + wx * PAF(y0, x1, ch_id2)) +
+          wy * ((1 - wx) * PAF(y1, x0, ch_id2) + wx * PAF(y1, x1, ch_id2));
+    return v;
 }
 
 int roundpaf(float v) {
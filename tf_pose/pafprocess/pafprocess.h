@@ -11,6 +11,8 @@ const float THRESH_HUMAN_SCORE = 0.3;
 const int NUM_PART = 18;
 
 const int STEP_PAF = 10;
+// samples that may fail THRESH_VECTOR_SCORE before a pair can no longer pass THRESH_VECTOR_CNT1
+const int MAX_VECTOR_MISS = STEP_PAF - THRESH_VECTOR_CNT1 - 1;
 
 const int COCOPAIRS_SIZE = 19;
 const int COCOPAIRS_NET[COCOPAIRS_SIZE][2] = {
@@ -50,12 +52,37 @@ struct Connection {
     int peak_id2;
 };
 
-int process_paf(int p1, int p2, int p3, float *peaks, int h1, int h2, int h3, float *heatmap, int f1, int f2, int f3, float *pafmap);
-int get_num_humans();
-int get_part_cid(int human_id, int part_id);
-float get_score(int human_id);
-int get_part_x(int cid);
-int get_part_y(int cid);
-float get_part_score(int cid);
+#ifndef SWIG
+struct PafSampler {
+    float *pafmap;
+    int f1, f2, f3;
+    float scale_y, scale_x;     // pafmap cells per heatmap pixel
+    bool interpolate;
+
+    VectorXY sample(int ch_id1, int ch_id2, float x, float y) const;
+};
+
+// subset rows holding each peak id in one part slot, sorted by row
+typedef std::vector<std::vector<int> > RowIndex;
+
+struct PafResult {
+    std::vector<std::vector<float> > subset;
+    std::vector<Peak> peak_infos_line;
+};
+#endif
+
+/*
+ * Both functions keep no state between calls, results are returned as newly allocated arrays:
+ * keypoints : n_humans x 18 x (x, y, heat score), coordinates normalized by the heatmap size, NaN for missing parts
+ * scores : n_humans human scores
+ * max_limb_length : pairs of peaks farther apart than this fraction of the heatmap height are not scored, 0 for all
+ * n_threads : threads scoring the limbs, humans are still assembled on the calling thread
+ */
+void process_paf(int p1, int p2, int p3, float *peaks, int h1, int h2, int h3, float *heatmap, int f1, int f2, int f3, float *pafmap,
+                 float max_limb_length, int n_threads,
+                 float **keypoints, int *n_humans, int *n_parts, int *n_values, float **scores, int *n_scores);
+void process_paf_sparse(int n1, int n2, float *peaks, int f1, int f2, int f3, float *pafmap, int heat_h, int heat_w,
+                        float max_limb_length, int n_threads,
+                        float **keypoints, int *n_humans, int *n_parts, int *n_values, float **scores, int *n_scores);
 
 #endif
@@ -2,6 +2,13 @@
 %{
   #define SWIG_FILE_WITH_INIT
   #include "pafprocess.h"
+
+  // numpy.i still uses the python 2 names, swig >= 4.1 no longer defines them
+  #if PY_MAJOR_VERSION >= 3 && !defined(PyInt_Check)
+  #define PyInt_Check(x) PyLong_Check(x)
+  #define PyInt_AsLong(x) PyLong_AsLong(x)
+  #define PyString_Check(x) PyBytes_Check(x)
+  #endif
 %}
 
 %include "numpy.i"
@@ -12,4 +19,19 @@ import_array();
 //%apply (int DIM1, int DIM2, int* IN_ARRAY2) {(int p1, int p2, int *peak_idxs)}
 //%apply (int DIM1, int DIM2, int DIM3, float* IN_ARRAY3) {(int h1, int h2, int h3, float *heatmap), (int f1, int f2, int f3, float *pafmap)};
 %apply (int DIM1, int DIM2, int DIM3, float* IN_ARRAY3) {(int p1, int p2, int p3, float *peaks), (int h1, int h2, int h3, float *heatmap), (int f1, int f2, int f3, float *pafmap)};
+%apply (int DIM1, int DIM2, float* IN_ARRAY2) {(int n1, int n2, float *peaks)};
+%apply (float** ARGOUTVIEWM_ARRAY3, int* DIM1, int* DIM2, int* DIM3) {(float **keypoints, int *n_humans, int *n_parts, int *n_values)};
+%apply (float** ARGOUTVIEWM_ARRAY1, int* DIM1) {(float **scores, int *n_scores)};
+
+// nothing is shared between calls, so frames can be processed on several threads at once
+%exception process_paf {
+  Py_BEGIN_ALLOW_THREADS
+  $action
+  Py_END_ALLOW_THREADS
+}
+%exception process_paf_sparse {
+  Py_BEGIN_ALLOW_THREADS
+  $action
+  Py_END_ALLOW_THREADS
+}
 %include "pafprocess.h"
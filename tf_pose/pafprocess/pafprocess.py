@@ -1,52 +1,17 @@
-# This file was automatically generated by SWIG (http://www.swig.org).
-# Version 4.0.0
+# This file was automatically generated by SWIG (https://www.swig.org).
+# Version 4.5.1
 #
-# Do not make changes to this file unless you know what you are doing--modify
+# Do not make changes to this file unless you know what you are doing - modify
 # the SWIG interface file instead.
 
-from sys import version_info as _swig_python_version_info
-if _swig_python_version_info < (2, 7, 0):
-    raise RuntimeError('Python 2.7 or later required')
-
+import typing
 # Import the low-level C/C++ module
-if __package__ or '.' in __name__:
+if getattr(globals().get("__spec__"), "parent", None) or __package__ or "." in __name__:
     from . import _pafprocess
 else:
     import _pafprocess
 
-try:
-    import builtins as __builtin__
-except ImportError:
-    import __builtin__
-
-def _swig_setattr_nondynamic(self, class_type, name, value, static=1):
-    if name == "thisown":
-        return self.this.own(value)
-    if name == "this":
-        if type(value).__name__ == 'SwigPyObject':
-            self.__dict__[name] = value
-            return
-    method = class_type.__swig_setmethods__.get(name, None)
-    if method:
-        return method(self, value)
-    if not static:
-        object.__setattr__(self, name, value)
-    else:
-        raise AttributeError("You cannot add attributes to %s" % self)
-
-
-def _swig_setattr(self, class_type, name, value):
-    return _swig_setattr_nondynamic(self, class_type, name, value, 0)
-
-
-def _swig_getattr(self, class_type, name):
-    if name == "thisown":
-        return self.this.own()
-    method = class_type.__swig_getmethods__.get(name, None)
-    if method:
-        return method(self)
-    raise AttributeError("'%s' object has no attribute '%s'" % (class_type.__name__, name))
-
+import builtins as __builtin__
 
 def _swig_repr(self):
     try:
@@ -58,10 +23,10 @@ def _swig_repr(self):
 
 def _swig_setattr_nondynamic_instance_variable(set):
     def set_instance_attr(self, name, value):
-        if name == "thisown":
-            self.this.own(value)
-        elif name == "this":
+        if name == "this":
             set(self, name, value)
+        elif name == "thisown":
+            self.this.own(value)
         elif hasattr(self, name) and isinstance(getattr(type(self), name), property):
             set(self, name, value)
         else:
@@ -78,20 +43,13 @@ def _swig_setattr_nondynamic_class_variable(set):
     return set_class_attr
 
 
-def _swig_add_metaclass(metaclass):
-    """Class decorator for adding a metaclass to a SWIG wrapped class - a slimmed down version of six.add_metaclass"""
-    def wrapper(cls):
-        return metaclass(cls.__name__, cls.__bases__, cls.__dict__.copy())
-    return wrapper
-
-
 class _SwigNonDynamicMeta(type):
     """Meta class to enforce nondynamic attributes (no new attributes) for a class"""
     __setattr__ = _swig_setattr_nondynamic_class_variable(type.__setattr__)
 
 
 class Peak(object):
-    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc='The membership flag')
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
     __repr__ = _swig_repr
     x = property(_pafprocess.Peak_x_get, _pafprocess.Peak_x_set)
     y = property(_pafprocess.Peak_y_get, _pafprocess.Peak_y_set)
@@ -112,12 +70,13 @@ THRESH_PART_CNT = cvar.THRESH_PART_CNT
 THRESH_HUMAN_SCORE = cvar.THRESH_HUMAN_SCORE
 NUM_PART = cvar.NUM_PART
 STEP_PAF = cvar.STEP_PAF
+MAX_VECTOR_MISS = cvar.MAX_VECTOR_MISS
 COCOPAIRS_SIZE = cvar.COCOPAIRS_SIZE
 COCOPAIRS_NET = cvar.COCOPAIRS_NET
 COCOPAIRS = cvar.COCOPAIRS
 
 class VectorXY(object):
-    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc='The membership flag')
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
     __repr__ = _swig_repr
     x = property(_pafprocess.VectorXY_x_get, _pafprocess.VectorXY_x_set)
     y = property(_pafprocess.VectorXY_y_get, _pafprocess.VectorXY_y_set)
@@ -128,9 +87,8 @@ class VectorXY(object):
 
 # Register VectorXY in _pafprocess:
 _pafprocess.VectorXY_swigregister(VectorXY)
-
 class ConnectionCandidate(object):
-    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc='The membership flag')
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
     __repr__ = _swig_repr
     idx1 = property(_pafprocess.ConnectionCandidate_idx1_get, _pafprocess.ConnectionCandidate_idx1_set)
     idx2 = property(_pafprocess.ConnectionCandidate_idx2_get, _pafprocess.ConnectionCandidate_idx2_set)
@@ -143,9 +101,8 @@ class ConnectionCandidate(object):
 
 # Register ConnectionCandidate in _pafprocess:
 _pafprocess.ConnectionCandidate_swigregister(ConnectionCandidate)
-
 class Connection(object):
-    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc='The membership flag')
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
     __repr__ = _swig_repr
     cid1 = property(_pafprocess.Connection_cid1_get, _pafprocess.Connection_cid1_set)
     cid2 = property(_pafprocess.Connection_cid2_get, _pafprocess.Connection_cid2_set)
@@ -160,26 +117,9 @@ class Connection(object):
 # Register Connection in _pafprocess:
 _pafprocess.Connection_swigregister(Connection)
 
+def process_paf(p1, h1, f1, max_limb_length, n_threads):
+    return _pafprocess.process_paf(p1, h1, f1, max_limb_length, n_threads)
 
-def process_paf(p1, h1, f1):
-    return _pafprocess.process_paf(p1, h1, f1)
-
-def get_num_humans():
-    return _pafprocess.get_num_humans()
-
-def get_part_cid(human_id, part_id):
-    return _pafprocess.get_part_cid(human_id, part_id)
-
-def get_score(human_id):
-    return _pafprocess.get_score(human_id)
-
-def get_part_x(cid):
-    return _pafprocess.get_part_x(cid)
-
-def get_part_y(cid):
-    return _pafprocess.get_part_y(cid)
-
-def get_part_score(cid):
-    return _pafprocess.get_part_score(cid)
-
+def process_paf_sparse(n1, f1, heat_h, heat_w, max_limb_length, n_threads):
+    return _pafprocess.process_paf_sparse(n1, f1, heat_h, heat_w, max_limb_length, n_threads)
 
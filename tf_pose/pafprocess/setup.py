@@ -8,7 +8,10 @@ setup(name='pafprocess_ext', version='1.0',
         Extension('_pafprocess', ['pafprocess.cpp', 'pafprocess.i'],
                   swig_opts=['-c++'],
                   depends=["pafprocess.h"],
-                  include_dirs=[numpy.get_include(), '.'])
+                  include_dirs=[numpy.get_include(), '.'],
+                  # limbs are scored on std::thread
+                  extra_compile_args=['-std=c++11', '-pthread'] if os.name != 'nt' else [],
+                  extra_link_args=['-pthread'] if os.name != 'nt' else [])
     ],
     py_modules=[
         "pafprocess"
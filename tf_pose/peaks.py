@@ -0,0 +1,130 @@
+import math
+
+import cv2
+import numpy as np
+
+from tf_pose.common import CocoPart
+
+# same as THRESH_HEAT in pafprocess/pafprocess.h
+THRESH_HEAT = 0.05
+
+_NMS_KERNEL = np.ones((3, 3), dtype=np.uint8)
+
+
+def downscale_kernel(kernel, scale):
+    """
+    Approximate a smoothing kernel made for the upsampled heatmap at network resolution
+    """
+    size = max(int(round(kernel.shape[0] / scale)), 1) | 1
+    small = cv2.resize(kernel, (size, size), interpolation=cv2.INTER_AREA)
+    return small / small.sum()
+
+
+def upsample_patch(heat, scale_y, scale_x, y0, y1, x0, x1):
+    """
+    Bilinear upsampling of one channel, computed only for the rows y0:y1 and columns x0:x1 of the upsampled map.
+    Pixel centers are aligned as by tf.image.resize_bilinear with align_corners=False.
+    :param heat: h x w heatmap channel
+    :return: (y1 - y0) x (x1 - x0) float32 array
+    """
+    h, w = heat.shape
+
+    def taps(start, stop, scale, size):
+        src = np.clip((np.arange(start, stop) + 0.5) / scale - 0.5, 0, size - 1)
+        idx0 = np.floor(src).astype(np.int32)
+        idx1 = np.minimum(idx0 + 1, size - 1)
+        return idx0, idx1, (src - idx0).astype(np.float32)
+
+    iy0, iy1, wy = taps(y0, y1, scale_y, h)
+    ix0, ix1, wx = taps(x0, x1, scale_x, w)
+    top = heat[iy0][:, ix0] * (1 - wx) + heat[iy0][:, ix1] * wx
+    bottom = heat[iy1][:, ix0] * (1 - wx) + heat[iy1][:, ix1] * wx
+    return top * (1 - wy)[:, None] + bottom * wy[:, None]
+
+
+def find_peaks(heat_mat, upsample_size, kernel, thresh=THRESH_HEAT, radius=1):
+    """
+    Cheaper equivalent of upsampling the whole heatmap, smoothing it and keeping its 3x3 local maxima.
+
+    Candidates are found at network resolution: 3x3 maxima of the heatmap smoothed with a downscaled kernel where
+    the raw heatmap around them exceeds thresh, and 3x3 maxima of the raw heatmap where the smoothed one exceeds
+    thresh, as close people leave peaks in the upsampled heatmap that are no maxima at network resolution. Only
+    the neighbourhood of `radius` network cells around each candidate is then upsampled bilinearly, smoothed with
+    the full kernel and searched for maxima.
+    :param heat_mat: network output heatmap, h x w x 19
+    :param upsample_size: (H, W) of the upsampled heatmap the peaks are searched in
+    :param kernel: 2d smoothing kernel for the upsampled heatmap
+    :return: float32 array of n x (part index, y, x, heat score) in upsampled pixels, ordered by y, x per part, as
+             PoseEstimator.estimate_paf_sparse takes them. The score is the upsampled heat before smoothing.
+    """
+    h, w = heat_mat.shape[:2]
+    up_h, up_w = upsample_size
+    scale_y, scale_x = up_h / float(h), up_w / float(w)
+    margin = kernel.shape[0] // 2 + 1
+    small_kernel = downscale_kernel(kernel, (scale_x + scale_y) / 2)
+
+    peaks = []
+    for part_idx in range(CocoPart.Background.value):
+        heat = np.ascontiguousarray(heat_mat[:, :, part_idx], dtype=np.float32)
+        smoothed = cv2.filter2D(heat, -1, small_kernel, borderType=cv2.BORDER_CONSTANT)
+        candidates = (smoothed == cv2.dilate(smoothed, _NMS_KERNEL)) & (cv2.dilate(heat, _NMS_KERNEL) > thresh)
+        candidates |= (heat == cv2.dilate(heat, _NMS_KERNEL)) & (smoothed > thresh)
+
+        part_peaks = {}
+        for y, x in zip(*np.nonzero(candidates)):
+            y0, y1 = max(int((y - radius) * scale_y), 0), min(int(math.ceil((y + radius + 1) * scale_y)), up_h)
+            x0, x1 = max(int((x - radius) * scale_x), 0), min(int(math.ceil((x + radius + 1) * scale_x)), up_w)
+            # smoothing with the margin is exact for the neighbourhood and the ring around it used by the nms
+            py0, py1 = max(y0 - margin, 0), min(y1 + margin, up_h)
+            px0, px1 = max(x0 - margin, 0), min(x1 + margin, up_w)
+
+            heat_up = upsample_patch(heat, scale_y, scale_x, py0, py1, px0, px1)
+            patch = cv2.filter2D(heat_up, -1, kernel, borderType=cv2.BORDER_CONSTANT)
+            core = (slice(y0 - py0, y1 - py0), slice(x0 - px0, x1 - px0))
+            is_peak = (patch[core] == cv2.dilate(patch, _NMS_KERNEL)[core]) & (patch[core] > thresh)
+            for peak_y, peak_x in zip(*np.nonzero(is_peak)):
+                # neighbouring candidates overlap, the same peak is found in both
+                part_peaks[(y0 + peak_y, x0 + peak_x)] = heat_up[y0 - py0 + peak_y, x0 - px0 + peak_x]
+        for (y, x), score in sorted(part_peaks.items()):
+            peaks.append((part_idx, y, x, score))
+    return np.array(peaks, dtype=np.float32).reshape(-1, 4)
+
+
+if __name__ == '__main__':
+    import argparse
+    import logging
+    import time
+
+    from tf_pose import common
+    from tf_pose.estimator import TfPoseEstimator
+    from tf_pose.networks import get_graph_path, model_wh
+
+    logger = logging.getLogger('TfPoseEstimator')
+
+    parser = argparse.ArgumentParser(description='compare dense and sparse peak search')
+    parser.add_argument('--image', type=str, default='./images/p1.jpg')
+    parser.add_argument('--model', type=str, default='mobilenet_thin')
+    parser.add_argument('--resize', type=str, default='432x368')
+    parser.add_argument('--resize-out-ratio', type=float, default=4.0)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    w, h = model_wh(args.resize)
+    image = common.read_imgfile(args.image, None, None)
+    results = {}
+    for sparse_peaks in (False, True):
+        e = TfPoseEstimator(get_graph_path(args.model), target_size=(w, h), sparse_peaks=sparse_peaks)
+        humans = e.inference(image, upsample_size=args.resize_out_ratio)
+        t = time.time()
+        for _ in range(args.repeats):
+            e.inference(image, upsample_size=args.resize_out_ratio)
+        elapsed = (time.time() - t) / args.repeats
+        e.close()
+
+        results[sparse_peaks] = humans
+        logger.info('sparse_peaks=%s #humans=%d time=%.5f' % (sparse_peaks, len(humans), elapsed))
+
+    diffs = [abs(part.x - other.body_parts[idx].x) + abs(part.y - other.body_parts[idx].y)
+             for human, other in zip(results[False], results[True])
+             for idx, part in human.body_parts.items() if idx in other.body_parts]
+    logger.info('max keypoint difference=%.5f' % max(diffs or [0.0]))
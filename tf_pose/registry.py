@@ -0,0 +1,75 @@
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from tf_pose.estimator import TfPoseEstimator
+from tf_pose.networks import get_graph_path
+
+logger = logging.getLogger('TfPoseEstimator')
+
+
+class ModelRegistry:
+    """
+    Thread-safe cache of loaded estimators keyed by (model name, target size).
+
+    Every model is loaded once per session config and the same estimator is handed out to all callers.
+    acquire() and release() keep a reference count; when more than `capacity` models are loaded, the least recently
+    used ones that are not held by anybody are closed.
+    """
+
+    def __init__(self, capacity=2):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, model, target_size, tf_config=None):
+        key = (model, tuple(target_size), tf_config.SerializeToString() if tf_config is not None else None)
+        with self._lock:
+            if key not in self._entries:
+                estimator = TfPoseEstimator(get_graph_path(model), target_size=key[1], tf_config=tf_config)
+                self._entries[key] = [estimator, 0]
+
+            entry = self._entries[key]
+            entry[1] += 1
+            self._entries.move_to_end(key)
+            self._evict()
+            return entry[0]
+
+    def release(self, estimator):
+        with self._lock:
+            for entry in self._entries.values():
+                if entry[0] is estimator:
+                    entry[1] -= 1
+                    break
+            self._evict()
+
+    @contextmanager
+    def estimator(self, model, target_size, tf_config=None):
+        estimator = self.acquire(model, target_size, tf_config)
+        try:
+            yield estimator
+        finally:
+            self.release(estimator)
+
+    def clear(self):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[1] <= 0]:
+                self._entries.pop(key)[0].close()
+
+    def _evict(self):
+        for key in list(self._entries.keys()):
+            if len(self._entries) <= self.capacity:
+                break
+            estimator, refs = self._entries[key]
+            if refs <= 0:
+                logger.info('unloading model %s(%dx%d)' % (key[0], key[1][0], key[1][1]))
+                del self._entries[key]
+                estimator.close()
+
+
+_registry = ModelRegistry()
+
+
+def get_registry():
+    return _registry
@@ -6,19 +6,24 @@ from functools import lru_cache
 
 from tf_pose import common
 from tf_pose import eval
-from tf_pose.estimator import TfPoseEstimator
+from tf_pose.estimator import TfPoseEstimator, HumanBatch
 from tf_pose.networks import get_graph_path, model_wh
+from tf_pose.session_config import get_tf_config, set_cpu_affinity
 
 Estimator = TfPoseEstimator
 
 
 @lru_cache(maxsize=1)
-def get_estimator(model='cmu', resize='0x0'):
+def get_estimator(model='cmu', resize='0x0', intra_op_threads=0, inter_op_threads=0, cpu_cores=None,
+                  opt_level='default'):
     w, h = model_wh(resize)
+    set_cpu_affinity(cpu_cores)
+    tf_config = get_tf_config(intra_op_threads, inter_op_threads, opt_level)
     if w == 0 or h == 0:
-        e = TfPoseEstimator(get_graph_path(model), target_size=(432, 368))
+        e = TfPoseEstimator(get_graph_path(model), target_size=(432, 368), tf_config=tf_config,
+                            warmup_sizes=None)
     else:
-        e = TfPoseEstimator(get_graph_path(model), target_size=(w, h))
+        e = TfPoseEstimator(get_graph_path(model), target_size=(w, h), tf_config=tf_config, warmup_sizes=None)
 
     return e
 
@@ -47,4 +52,5 @@ def infer(image, model='cmu', resize='0x0', resize_out_ratio=4.0):
         image_str = cv2.imencode(".jpg", image)[1].tostring()
         print("\033]1337;File=name=;inline=1:" + base64.b64encode(image_str).decode("utf-8") + "\a")
 
-    return [(eval.write_coco_json(human, image_w, image_h), human.score) for human in humans]
+    humans = HumanBatch.from_humans(humans)
+    return list(zip(eval.write_coco_json_batch(humans, image_w, image_h), humans.scores.tolist()))
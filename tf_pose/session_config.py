@@ -0,0 +1,187 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from queue import Empty
+
+import tensorflow as tf
+from tensorflow.core.protobuf import rewriter_config_pb2
+
+from tf_pose.estimator import TfPoseEstimator
+
+logger = logging.getLogger('TfPoseEstimator')
+
+OPT_LEVELS = ('none', 'default', 'xla')
+
+
+def parse_cores(cores):
+    """
+    Parse a core list like '0-3,6' into a sorted list of core ids, None / '' for no pinning
+    """
+    if not cores:
+        return None
+    if not isinstance(cores, str):
+        return sorted(set(int(core) for core in cores))
+
+    result = set()
+    for part in cores.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            result.update(range(int(first), int(last) + 1))
+        elif part.strip():
+            result.add(int(part))
+    return sorted(result)
+
+
+def set_cpu_affinity(cores):
+    """
+    Pin the calling thread to the given cores, threads and processes it starts afterwards inherit the affinity.
+    TensorFlow creates its thread pools with the first session of the process, so this has to run before any
+    estimator is created: the pools of existing estimators, e.g. shared through ModelRegistry, stay where they are.
+    Ignored where the OS does not support it.
+    :param cores: list of core ids or a string like '0-3,6'
+    :return: True if the affinity was set
+    """
+    cores = parse_cores(cores)
+    if not cores:
+        return False
+    if not hasattr(os, 'sched_setaffinity'):
+        logger.warning('cpu affinity is not supported on this platform, cores=%s ignored' % cores)
+        return False
+    os.sched_setaffinity(0, cores)
+    return True
+
+
+def get_tf_config(intra_op_threads=0, inter_op_threads=0, opt_level='default'):
+    """
+    Build a session config for TfPoseEstimator.
+    :param intra_op_threads: threads used inside a single op, 0 lets TensorFlow pick (all cores)
+    :param inter_op_threads: ops run concurrently, 0 lets TensorFlow pick
+    :param opt_level: 'none' disables graph optimisations including constant folding, 'default' keeps TensorFlow
+                      defaults (constant folding, common subexpression elimination), 'xla' additionally compiles
+                      the graph with XLA JIT, on CPU as well
+    :return: tf.ConfigProto
+    """
+    if opt_level not in OPT_LEVELS:
+        raise ValueError('unknown optimisation level: %s, expected one of %s' % (opt_level, ', '.join(OPT_LEVELS)))
+
+    config = tf.ConfigProto(intra_op_parallelism_threads=intra_op_threads,
+                            inter_op_parallelism_threads=inter_op_threads)
+    graph_options = config.graph_options
+    if opt_level == 'none':
+        graph_options.optimizer_options.opt_level = tf.OptimizerOptions.L0
+        graph_options.rewrite_options.constant_folding = rewriter_config_pb2.RewriterConfig.OFF
+    else:
+        graph_options.optimizer_options.opt_level = tf.OptimizerOptions.L1
+        graph_options.rewrite_options.constant_folding = rewriter_config_pb2.RewriterConfig.ON
+
+    if opt_level == 'xla':
+        graph_options.optimizer_options.global_jit_level = tf.OptimizerOptions.ON_1
+        # global jit only covers GPU unless CPU clustering is enabled too, before the first session is created
+        xla_flags = os.environ.get('TF_XLA_FLAGS', '')
+        if '--tf_xla_cpu_global_jit' not in xla_flags:
+            os.environ['TF_XLA_FLAGS'] = (xla_flags + ' --tf_xla_cpu_global_jit').strip()
+    return config
+
+
+def add_tf_arguments(parser):
+    """
+    Add session options shared by the command line tools to an argparse parser
+    """
+    parser.add_argument('--intra-op-threads', type=int, default=0,
+                        help='threads used inside one tensorflow op, 0 for all cores. default=0')
+    parser.add_argument('--inter-op-threads', type=int, default=0,
+                        help='tensorflow ops run concurrently, 0 for automatic. default=0')
+    parser.add_argument('--cpu-cores', type=str, default='', help='pin the process to these cores, e.g. 0-3,6')
+    parser.add_argument('--opt-level', type=str, default='default', choices=OPT_LEVELS,
+                        help='graph optimisations: none / default (constant folding) / xla. default=default')
+    parser.add_argument('--bench', action='store_true',
+                        help='sweep thread counts and optimisation levels on the input and report the fastest')
+    return parser
+
+
+def get_tf_config_from_args(args):
+    """
+    Apply --cpu-cores and build the session config from the options added by add_tf_arguments
+    """
+    set_cpu_affinity(args.cpu_cores)
+    return get_tf_config(args.intra_op_threads, args.inter_op_threads, args.opt_level)
+
+
+def get_bench_settings(cpu_count=None):
+    """
+    Candidate (intra_op_threads, inter_op_threads, opt_level) for the benchmark: powers of two up to the number
+    of cores available to the process
+    """
+    if cpu_count is None:
+        cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    intra = sorted(set([2 ** i for i in range(cpu_count.bit_length()) if 2 ** i <= cpu_count] + [cpu_count]))
+    return list(itertools.product(intra, (1, 2), OPT_LEVELS[1:]))
+
+
+def _benchmark_setting(graph_path, target_size, images, setting, resize_to_default, upsample_size, repeats, results):
+    try:
+        e = TfPoseEstimator(graph_path, target_size=target_size, tf_config=get_tf_config(*setting))
+        try:
+            # first runs compile / tune the graph
+            e.inference(images[0], resize_to_default=resize_to_default, upsample_size=upsample_size)
+
+            t = time.time()
+            for i in range(repeats):
+                e.inference(images[i % len(images)], resize_to_default=resize_to_default,
+                            upsample_size=upsample_size)
+            results.put((time.time() - t) / repeats)
+        finally:
+            e.close()
+    except Exception as e:
+        results.put('%s: %s' % (type(e).__name__, e))
+
+
+def benchmark(graph_path, target_size, images, settings=None, resize_to_default=True, upsample_size=4.0,
+              repeats=10):
+    """
+    Measure inference speed of every setting on the given images. Every setting runs in a fresh process: the
+    thread pools of TensorFlow and TF_XLA_FLAGS are fixed by the first session of a process, a second estimator in
+    the same process would silently reuse them.
+    :param images: list of BGR images
+    :param settings: list of (intra_op_threads, inter_op_threads, opt_level), get_bench_settings() by default
+    :return: list of (seconds per image, setting) sorted from the fastest
+    """
+    # tensorflow does not survive fork, workers are started fresh
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for setting in settings or get_bench_settings():
+        queue = context.Queue()
+        worker = context.Process(target=_benchmark_setting, args=(
+            graph_path, target_size, images, setting, resize_to_default, upsample_size, repeats, queue))
+        worker.start()
+        try:
+            elapsed = None
+            while elapsed is None:
+                try:
+                    elapsed = queue.get(timeout=0.5)
+                except Empty:
+                    if not worker.is_alive() and queue.empty():
+                        raise RuntimeError('benchmark worker exited unexpectedly')
+        finally:
+            worker.join()
+        if isinstance(elapsed, str):
+            raise RuntimeError('benchmark of %s failed, %s' % (setting, elapsed))
+
+        logger.info('intra_op_threads=%d inter_op_threads=%d opt_level=%s : %.4f sec/image' % (setting + (elapsed,)))
+        results.append((elapsed, setting))
+    return sorted(results)
+
+
+def report_benchmark(results):
+    """
+    Log the benchmark results, fastest first
+    :return: the fastest setting
+    """
+    for elapsed, (intra, inter, opt_level) in results:
+        logger.info('%.4f sec/image  --intra-op-threads %d --inter-op-threads %d --opt-level %s' %
+                    (elapsed, intra, inter, opt_level))
+    best = results[0][1]
+    logger.info('best: --intra-op-threads %d --inter-op-threads %d --opt-level %s' % best)
+    return best
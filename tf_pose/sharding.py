@@ -0,0 +1,145 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from queue import Empty
+
+import cv2
+import numpy as np
+
+from tf_pose.estimator import TfPoseEstimator
+from tf_pose.keypoints import open_keypoint_writer, merge_keypoint_files
+from tf_pose.networks import get_graph_path, model_wh
+from tf_pose.session_config import get_tf_config, parse_cores, set_cpu_affinity
+from tf_pose.video import FrameSampler, read_frames, concat_videos, open_intermediate_writer
+
+logger = logging.getLogger('TfPoseEstimator')
+
+_PROGRESS, _DONE, _ERROR = range(3)
+
+
+def split_frames(frames, n_shards):
+    """
+    Split frame numbers into at most n_shards contiguous, nearly equal parts
+    """
+    n_shards = max(min(n_shards, len(frames)), 1)
+    bounds = np.linspace(0, len(frames), n_shards + 1).astype(int)
+    return [frames[bounds[i]:bounds[i + 1]] for i in range(n_shards)]
+
+
+def _process_shard(shard_id, frames, video_path, keypoints_path, video_output_path, video_fps, model, resolution,
+                   upsample_size, show_bg, pixel_coords, intra_op_threads, opt_level, cores, messages):
+    try:
+        set_cpu_affinity(cores)
+        w, h = model_wh(resolution)
+        tf_config = get_tf_config(intra_op_threads, 1, opt_level)
+        e = TfPoseEstimator(get_graph_path(model), target_size=(w, h), tf_config=tf_config)
+
+        cap = cv2.VideoCapture(video_path)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        keypoints_output = open_keypoint_writer(keypoints_path, capacity=len(frames),
+                                                image_size=(width, height) if pixel_coords else None)
+        video_output = open_intermediate_writer(video_output_path, video_fps, (width, height)) \
+            if video_output_path else None
+
+        try:
+            for frame_idx, image in read_frames(cap, frames):
+                humans = e.inference(image, resize_to_default=(w > 0 and h > 0), upsample_size=upsample_size)
+                keypoints_output.write(frame_idx, humans)
+
+                if video_output:
+                    if not show_bg:
+                        image = np.zeros(image.shape, dtype=np.uint8)
+                    video_output.write(TfPoseEstimator.draw_humans(image, humans, imgcopy=False))
+                messages.put((_PROGRESS, shard_id, 1))
+        finally:
+            cap.release()
+            keypoints_output.close()
+            if video_output:
+                video_output.release()
+
+        messages.put((_DONE, shard_id, None))
+    except Exception as e:
+        messages.put((_ERROR, shard_id, '%s: %s' % (type(e).__name__, e)))
+
+
+def process_video_sharded(video_path, output_keypoints, output_video=None, n_shards=2, model='mobilenet_thin',
+                          resolution='432x368', upsample_size=4.0, show_bg=True, pixel_coords=False, sampler=None,
+                          intra_op_threads=None, opt_level='default', cpu_cores=None, progress_callback=None,
+                          is_cancelled=None):
+    """
+    Process one long video in n_shards worker processes, each of them running its own estimator on a contiguous
+    range of frames with intra_op_threads TensorFlow threads. Keypoints and rendered parts are merged back in order.
+    :param cpu_cores: cores split between the workers, every worker is pinned to its part
+    :param progress_callback: called with (frames done, frames total)
+    :param is_cancelled: polled while the workers run, returns True to stop them
+    :return: False if cancelled, True otherwise
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError('can not open video: %s' % video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frames_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+
+    sampler = sampler or FrameSampler()
+    frames = sampler.get_frames(fps, frames_total)
+    shards = split_frames(frames, n_shards)
+    cores = parse_cores(cpu_cores)
+    shard_cores = [list(part) for part in np.array_split(cores, len(shards))] if cores else [None] * len(shards)
+    if intra_op_threads is None:
+        intra_op_threads = max((len(cores) if cores else multiprocessing.cpu_count()) // len(shards), 1)
+    logger.info('processing %d frames of %s in %d shards' % (len(frames), video_path, len(shards)))
+
+    # tensorflow does not survive fork, workers are started fresh
+    context = multiprocessing.get_context('spawn')
+    messages = context.Queue()
+    tmp_dir = tempfile.mkdtemp(prefix='tf_pose_shards_')
+    ext = os.path.splitext(output_keypoints)[1] or '.csv'
+    keypoints_parts = [os.path.join(tmp_dir, 'keypoints_%03d%s' % (i, ext)) for i in range(len(shards))]
+    video_parts = [os.path.join(tmp_dir, 'video_%03d.avi' % i) for i in range(len(shards))] if output_video else None
+
+    output_fps = sampler.get_output_fps(fps)
+    workers = [
+        context.Process(target=_process_shard, args=(
+            i, shard, video_path, keypoints_parts[i], video_parts[i] if video_parts else None, output_fps, model,
+            resolution, upsample_size, show_bg, pixel_coords, intra_op_threads, opt_level, shard_cores[i], messages))
+        for i, shard in enumerate(shards)
+    ]
+    try:
+        for worker in workers:
+            worker.start()
+
+        frames_done, running = 0, len(workers)
+        while running > 0:
+            if is_cancelled is not None and is_cancelled():
+                return False
+            try:
+                message, shard_id, value = messages.get(timeout=0.5)
+            except Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    raise RuntimeError('video shard worker exited unexpectedly')
+                continue
+
+            if message == _PROGRESS:
+                frames_done += value
+                if progress_callback is not None:
+                    progress_callback(frames_done, len(frames))
+            elif message == _DONE:
+                running -= 1
+            else:
+                raise RuntimeError('video shard #%d failed, %s' % (shard_id, value))
+
+        merge_keypoint_files(keypoints_parts, output_keypoints)
+        if output_video:
+            concat_videos(video_parts, output_video, output_fps, size)
+        return True
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -32,12 +32,16 @@ def layer(op):
 
 
 class Smoother(object):
-    def __init__(self, inputs, filter_size, sigma):
+    def __init__(self, inputs, filter_size, sigma, separable=True):
+        """
+        :param separable: apply the gaussian as a k x 1 and a 1 x k pass, 2k instead of k^2 multiply-adds per pixel
+        """
         self.inputs = inputs
         self.terminals = []
         self.layers = dict(inputs)
         self.filter_size = filter_size
         self.sigma = sigma
+        self.separable = separable
         self.setup()
 
     def setup(self):
@@ -59,7 +63,16 @@ class Smoother(object):
             self.terminals.append(fed_layer)
         return self
 
-    def gauss_kernel(self, kernlen=21, nsig=3, channels=1):
+    @staticmethod
+    def gauss_kernel_1d(kernlen=21, nsig=3):
+        # gauss_kernel is the outer product of this kernel with itself
+        interval = (2*nsig+1.)/(kernlen)
+        x = np.linspace(-nsig-interval/2., nsig+interval/2., kernlen+1)
+        kern1d = np.sqrt(np.diff(st.norm.cdf(x)))
+        return np.array(kern1d/kern1d.sum(), dtype=np.float32)
+
+    @staticmethod
+    def gauss_kernel(kernlen=21, nsig=3, channels=1):
         interval = (2*nsig+1.)/(kernlen)
         x = np.linspace(-nsig-interval/2., nsig+interval/2., kernlen+1)
         kern1d = np.diff(st.norm.cdf(x))
@@ -70,11 +83,15 @@ class Smoother(object):
         out_filter = np.repeat(out_filter, channels, axis = 2)
         return out_filter
 
-    def make_gauss_var(self, name, size, sigma, c_i):
-        # with tf.device("/cpu:0"):
+    def make_gauss_const(self, name, size, sigma, c_i):
+        # a graph constant, not a variable : nothing to initialize before the first run
         kernel = self.gauss_kernel(size, sigma, c_i)
-        var = tf.Variable(tf.convert_to_tensor(kernel), name=name)
-        return var
+        return tf.constant(kernel, name=name)
+
+    def make_gauss_const_1d(self, name, size, sigma, c_i, axis):
+        kernel = self.gauss_kernel_1d(size, sigma)
+        kernel = np.repeat(kernel.reshape((size, 1, 1, 1) if axis == 0 else (1, size, 1, 1)), c_i, axis=2)
+        return tf.constant(kernel, name=name)
 
     def get_output(self):
         '''Returns the smoother output.'''
@@ -90,6 +107,11 @@ class Smoother(object):
         # Convolution for a given input and kernel
         convolve = lambda i, k: tf.nn.depthwise_conv2d(i, k, [1, 1, 1, 1], padding=padding)
         with tf.variable_scope(name) as scope:
-            kernel = self.make_gauss_var('gauss_weight', self.filter_size, self.sigma, c_i)
-            output = convolve(input, kernel)
+            if self.separable:
+                kernel_y = self.make_gauss_const_1d('gauss_weight_y', self.filter_size, self.sigma, c_i, 0)
+                kernel_x = self.make_gauss_const_1d('gauss_weight_x', self.filter_size, self.sigma, c_i, 1)
+                output = convolve(convolve(input, kernel_y), kernel_x)
+            else:
+                kernel = self.make_gauss_const('gauss_weight', self.filter_size, self.sigma, c_i)
+                output = convolve(input, kernel)
         return output
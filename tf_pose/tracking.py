@@ -0,0 +1,124 @@
+import logging
+
+import numpy as np
+
+from tf_pose.estimator import HumanBatch
+
+logger = logging.getLogger('TfPoseEstimator')
+
+
+def get_human_boxes(humans):
+    """
+    Bounding boxes of the detected parts of each human
+    :param humans: list of Human or HumanBatch
+    :return: n x (x0, y0, x1, y1) array, normalized to the image
+    """
+    coords = HumanBatch.from_humans(humans).coords
+    if len(coords) == 0:
+        return np.zeros((0, 4), dtype=np.float32)
+    return np.column_stack([np.nanmin(coords[..., 0], axis=1), np.nanmin(coords[..., 1], axis=1),
+                            np.nanmax(coords[..., 0], axis=1), np.nanmax(coords[..., 1], axis=1)])
+
+
+class RoiTracker:
+    """
+    Runs the network only on crops around the humans of the previous frame.
+
+    full_frame_interval : the whole frame is processed at least every Nth frame, so new people are found
+    margin : crops grow by this fraction of the human size on every side, for the movement between frames
+    max_rois : more crops than this cost more than a full frame pass, the whole frame is processed instead
+    max_zoom : crops are at least 1/max_zoom of the frame, tiny crops upscale too much and lose the context
+    resize_to_default, upsample_size : as in TfPoseEstimator.inference, crops are always resized to target_size
+
+    The whole frame is processed again as soon as the crops find fewer humans than the previous frame.
+    """
+
+    def __init__(self, estimator, full_frame_interval=10, margin=0.2, max_rois=2, max_zoom=3.0,
+                 resize_to_default=True, upsample_size=4.0):
+        self.estimator = estimator
+        self.full_frame_interval = max(int(full_frame_interval), 1)
+        self.margin = margin
+        self.max_rois = max_rois
+        self.max_zoom = max_zoom
+        self.resize_to_default = resize_to_default
+        self.upsample_size = upsample_size
+
+        self.humans = None
+        self.tracked_frames = 0
+        self.full_frames = 0
+        self.roi_frames = 0
+
+    def reset(self):
+        self.humans = None
+        self.tracked_frames = 0
+
+    def inference(self, npimg):
+        """
+        Humans of the next frame, found in the crops of get_rois() or in the whole frame
+        :param npimg:
+        :return: HumanBatch, coordinates relative to the whole frame
+        """
+        humans = None
+        if self.humans is not None and self.tracked_frames + 1 < self.full_frame_interval:
+            rois = self.get_rois(self.humans, npimg.shape[1], npimg.shape[0])
+            if rois:
+                humans = self.estimator.inference_rois(npimg, rois, upsample_size=self.upsample_size)
+                if len(humans) < len(self.humans):
+                    logger.debug('roi tracking lost %d humans' % (len(self.humans) - len(humans)))
+                    humans = None
+
+        if humans is None:
+            humans = HumanBatch.from_humans(self.estimator.inference(
+                npimg, resize_to_default=self.resize_to_default, upsample_size=self.upsample_size))
+            self.tracked_frames = 0
+            self.full_frames += 1
+        else:
+            self.tracked_frames += 1
+            self.roi_frames += 1
+        self.humans = humans
+        return humans
+
+    def get_rois(self, humans, img_w, img_h):
+        """
+        Crops covering the humans, with the aspect ratio of the network input. Overlapping crops are merged.
+        :return: list of (x, y, w, h) relative to the image, None when the whole frame should be processed
+        """
+        if len(humans) == 0:
+            return None
+
+        boxes = get_human_boxes(humans) * (img_w, img_h, img_w, img_h)
+        size = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+        boxes += np.outer(size * self.margin, (-1, -1, 1, 1))
+        boxes = [self._fit_box(box, img_w, img_h) for box in boxes]
+
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(boxes)):
+                for j in range(i + 1, len(boxes)):
+                    box1, box2 = boxes[i], boxes[j]
+                    if box1[0] < box2[2] and box2[0] < box1[2] and box1[1] < box2[3] and box2[1] < box1[3]:
+                        boxes[i] = self._fit_box((min(box1[0], box2[0]), min(box1[1], box2[1]),
+                                                  max(box1[2], box2[2]), max(box1[3], box2[3])), img_w, img_h)
+                        del boxes[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+
+        if len(boxes) > self.max_rois:
+            return None
+        return [(x0 / img_w, y0 / img_h, (x1 - x0) / img_w, (y1 - y0) / img_h) for x0, y0, x1, y1 in boxes]
+
+    def _fit_box(self, box, img_w, img_h):
+        # grow to the aspect ratio of the network input and the minimum size, then shift inside the image
+        target_w, target_h = self.estimator.target_size
+        x0, y0, x1, y1 = box
+        w = max(x1 - x0, img_w / self.max_zoom)
+        h = max(y1 - y0, img_h / self.max_zoom)
+        w, h = max(w, h * target_w / target_h), max(h, w * target_h / target_w)
+        w, h = min(w, img_w), min(h, img_h)
+
+        x = min(max((x0 + x1 - w) / 2.0, 0.0), img_w - w)
+        y = min(max((y0 + y1 - h) / 2.0, 0.0), img_h - h)
+        return x, y, x + w, y + h
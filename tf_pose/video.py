@@ -0,0 +1,185 @@
+import math
+
+import cv2
+import numpy as np
+
+
+class FrameSampler:
+    """
+    Selects which frames of a video are processed.
+
+    stride : process every Nth frame
+    target_fps : process about target_fps frames per second of video, 0 / None for all frames
+    start, end : time range in seconds, None for the beginning / end of the video
+
+    Frames before start are skipped by seeking, frames between the selected ones are only grabbed, not decoded.
+    """
+
+    def __init__(self, stride=1, target_fps=None, start=None, end=None):
+        self.stride = max(int(stride), 1)
+        self.target_fps = target_fps
+        self.start = start
+        self.end = end
+
+    def get_step(self, fps):
+        step = float(self.stride)
+        if self.target_fps and fps > 0:
+            step = max(step, fps / self.target_fps)
+        return step
+
+    def get_output_fps(self, fps):
+        return fps / self.get_step(fps)
+
+    def get_frame_range(self, fps, frames_total):
+        first, last = 0, frames_total
+        if fps > 0:
+            if self.start:
+                first = min(int(round(self.start * fps)), frames_total)
+            if self.end:
+                last = max(min(int(math.floor(self.end * fps)) + 1, frames_total), first)
+        return first, last
+
+    def count(self, fps, frames_total):
+        first, last = self.get_frame_range(fps, frames_total)
+        return int(math.ceil((last - first) / self.get_step(fps)))
+
+    def get_frames(self, fps, frames_total):
+        """
+        Frame numbers that read() selects in a video of frames_total frames
+        """
+        first, last = self.get_frame_range(fps, frames_total)
+        step = self.get_step(fps)
+        frames = [int(math.ceil(first + k * step)) for k in range(self.count(fps, frames_total))]
+        return [frame_idx for frame_idx in frames if frame_idx < last]
+
+    def read(self, cap):
+        """
+        Generate (frame number, image) for the selected frames of an opened cv2.VideoCapture
+        :param cap:
+        :return:
+        """
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        step = self.get_step(fps)
+
+        if self.start:
+            cap.set(cv2.CAP_PROP_POS_MSEC, self.start * 1000.0)
+        frame_idx = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+        next_frame = frame_idx
+        while cap.isOpened():
+            if self.end and fps > 0 and frame_idx / fps > self.end:
+                break
+            if not cap.grab():
+                break
+
+            if frame_idx >= next_frame:
+                ret_val, image = cap.retrieve()
+                if not ret_val or image is None:
+                    break
+                yield frame_idx, image
+                next_frame += step
+            frame_idx += 1
+
+
+def read_frames(cap, frames):
+    """
+    Generate (frame number, image) for the given ascending frame numbers of an opened cv2.VideoCapture.
+    The capture seeks to the first frame, the frames in between are only grabbed.
+    :param cap:
+    :param frames:
+    :return:
+    """
+    if not frames:
+        return
+
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frames[0])
+    frame_idx = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if frame_idx != frames[0]:
+        # inexact seek, walk from the beginning instead
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        frame_idx = 0
+
+    wanted = iter(frames)
+    next_frame = next(wanted)
+    while cap.isOpened() and next_frame is not None:
+        if not cap.grab():
+            break
+
+        if frame_idx == next_frame:
+            ret_val, image = cap.retrieve()
+            if not ret_val or image is None:
+                break
+            yield frame_idx, image
+            next_frame = next(wanted, None)
+        frame_idx += 1
+
+
+def open_intermediate_writer(path, fps, size):
+    """
+    cv2.VideoWriter for parts that are decoded again by concat_videos. Lossless FFV1 where the OpenCV build
+    supports it, so the frames are compressed lossily only once, otherwise MJPG.
+    """
+    for fourcc in ('FFV1', 'MJPG'):
+        output = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if output.isOpened():
+            return output
+        output.release()
+    raise IOError('can not open video writer: %s' % path)
+
+
+def concat_videos(paths, output_path, fps, size):
+    """
+    Write the frames of several videos one after another into output_path
+    """
+    output = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'DIVX'), fps, size)
+    try:
+        for path in paths:
+            cap = cv2.VideoCapture(path)
+            while cap.isOpened():
+                ret_val, image = cap.read()
+                if not ret_val:
+                    break
+                output.write(image)
+            cap.release()
+    finally:
+        output.release()
+
+
+class MotionGate:
+    """
+    Cheap frame difference test run before inference, so static frames can reuse the previous humans.
+
+    Frames are downscaled to `width` pixels, converted to grayscale and compared with the last frame that was let
+    through to inference. A frame is static when less than motion_threshold of its pixels changed by more than
+    pixel_threshold.
+    """
+
+    def __init__(self, pixel_threshold=25, motion_threshold=0.005, width=64):
+        self.pixel_threshold = pixel_threshold
+        self.motion_threshold = motion_threshold
+        self.width = width
+
+        self.inferred = 0
+        self.skipped = 0
+        self._reference = None
+
+    def _downscale(self, image):
+        h, w = image.shape[:2]
+        size = (self.width, max(int(round(h * self.width / float(w))), 1))
+        small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def is_static(self, image):
+        small = self._downscale(image)
+        if self._reference is not None and self._reference.shape == small.shape:
+            diff = cv2.absdiff(small, self._reference)
+            changed = np.count_nonzero(diff > self.pixel_threshold) / float(diff.size)
+            if changed < self.motion_threshold:
+                self.skipped += 1
+                return True
+
+        self._reference = small
+        self.inferred += 1
+        return False